@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from collections import namedtuple, deque
+
+import numpy as np
+import pandas as pd
+
+ALERT_LOG = os.environ.get('ALERT_LOG', 'alerts.jsonl')
+FEED_SIZE = 50
+TARGET_COLUMNS = ['Sell Target 1', 'Sell Target 2', 'Sell Target 3']
+
+Alert = namedtuple('Alert', ['time', 'portfolio', 'trade_id', 'ticker', 'level', 'target', 'price'])
+
+
+def alert_key(portfolio, trade_id, level, target):
+    # The target price is part of the key, so editing a target arms it again
+    return f"{portfolio}:{trade_id}:{level}:{target:g}"
+
+
+def read_log(path=ALERT_LOG, portfolio=None):
+    alerts = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    alert = Alert(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+                if portfolio is None or alert.portfolio == portfolio:
+                    alerts.append(alert)
+    except OSError:
+        pass
+    return alerts
+
+
+def _ranges(starts, lengths):
+    # Concatenated aranges [start, start + length) without a Python loop
+    total = lengths.sum()
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return offsets + np.arange(total)
+
+
+class AlertEngine:
+    """Sell targets of a portfolio's open positions as flat arrays, checked on every quote update.
+
+    Targets are grouped by ticker, and each update only looks at the targets of tickers whose price
+    moved. A target fires once, when the price first reaches it. Fired targets are remembered in
+    the append-only log, so rebuilding the engine after a ledger edit doesn't repeat them.
+    """
+
+    def __init__(self, portfolio, trades_df, tickers, positions, log_path=ALERT_LOG):
+        self.portfolio = portfolio
+        self.log_path = log_path
+        self._lock = threading.Lock()
+
+        open_idx = positions.index[positions['type'] != 'CLOSED']
+        targets = trades_df.loc[open_idx, TARGET_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        n = len(open_idx)
+        target = targets.ravel()
+        level = np.tile(np.arange(1, len(TARGET_COLUMNS) + 1), n)
+        trade_id = np.repeat(trades_df.loc[open_idx, 'id'].to_numpy(), len(TARGET_COLUMNS))
+        ticker = np.repeat(tickers[open_idx].to_numpy(dtype=object), len(TARGET_COLUMNS))
+        armed = np.isfinite(target) & (target > 0)
+
+        order = np.argsort(ticker[armed], kind='stable')
+        self.target = target[armed][order]
+        self.level = level[armed][order]
+        self.trade_id = trade_id[armed][order]
+        ticker = ticker[armed][order]
+        self.tickers, self.offsets = np.unique(ticker, return_index=True)
+        self.counts = np.diff(np.append(self.offsets, len(ticker)))
+        self.last_price = np.full(len(self.tickers), np.nan)
+
+        logged = read_log(log_path, portfolio)
+        fired_keys = {alert_key(a.portfolio, a.trade_id, a.level, a.target) for a in logged}
+        self.fired = np.zeros(len(self.target), dtype=bool)
+        if fired_keys:
+            self.fired[:] = [alert_key(portfolio, i, l, t) in fired_keys
+                             for i, l, t in zip(self.trade_id, self.level, self.target)]
+        self.feed = deque(reversed(logged[-FEED_SIZE:]), maxlen=FEED_SIZE)
+
+    def __len__(self):
+        return len(self.target)
+
+    def evaluate(self, prices):
+        """Check the targets of tickers whose price changed; returns the alerts that fired now."""
+        if not len(self.tickers):
+            return []
+        with self._lock:
+            price = pd.Series(prices, dtype=float).reindex(self.tickers).to_numpy()
+            changed = np.flatnonzero(np.isfinite(price) & (price != self.last_price))
+            if not len(changed):
+                return []
+            self.last_price[changed] = price[changed]
+            idx = _ranges(self.offsets[changed], self.counts[changed])
+            ticker_price = np.repeat(price[changed], self.counts[changed])
+            hit = ~self.fired[idx] & (ticker_price >= self.target[idx])
+            if not hit.any():
+                return []
+            idx, hit_price = idx[hit], ticker_price[hit]
+            self.fired[idx] = True
+            ticker = np.repeat(self.tickers[changed], self.counts[changed])[hit]
+            now = time.time()
+            alerts = [Alert(now, self.portfolio, int(i), t, int(l), float(target), float(p))
+                      for i, t, l, target, p in zip(self.trade_id[idx], ticker, self.level[idx], self.target[idx], hit_price)]
+            self._log(alerts)
+            self.feed.extendleft(alerts)
+            return alerts
+
+    def recent(self):
+        with self._lock:
+            return list(self.feed)
+
+    def _log(self, alerts):
+        try:
+            with open(self.log_path, 'a') as f:
+                f.writelines(json.dumps(alert._asdict()) + '\n' for alert in alerts)
+        except OSError:
+            pass
@@ -0,0 +1,384 @@
+from calendar import month_abbr
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+def calculate_position(row, current_price):
+    try:
+        entry_price = float(row['Entry Price'])
+        initial_capital = float(row['Capital'])
+        initial_shares = initial_capital / entry_price
+        sell_pct = 0
+        if 'Sell %' in row and row['Sell %'] and str(row['Sell %']).strip():
+            try:
+                sell_pct = float(row['Sell %'])
+            except:
+                sell_pct = 0
+        trade_status = str(row.get('Trade Status', '')).upper().strip()
+        sell_price = row.get('Sell Price', '')
+        
+        if trade_status == 'CLOSED' or sell_pct >= 100:
+            if sell_price and str(sell_price).strip():
+                sell_val = float(sell_price)
+            else:
+                sell_val = current_price if current_price else entry_price
+            realized_pnl = (sell_val - entry_price) * initial_shares
+            realized_pnl_pct = (realized_pnl / initial_capital) * 100
+            return {
+                'type': 'CLOSED', 'initial_capital': initial_capital, 'initial_shares': initial_shares,
+                'remaining_shares': 0, 'remaining_capital': 0, 'current_value': 0,
+                'realized_pnl': realized_pnl, 'realized_pnl_pct': realized_pnl_pct,
+                'unrealized_pnl': 0, 'unrealized_pnl_pct': 0,
+                'total_pnl': realized_pnl, 'total_pnl_pct': realized_pnl_pct,
+                'avg_sell_price': sell_val, 'status': '🔒 Closed'
+            }
+        
+        elif sell_pct > 0 and sell_pct < 100:
+            if not sell_price or not str(sell_price).strip():
+                sell_pct = 0
+            else:
+                sell_val = float(sell_price)
+                sold_shares = initial_shares * (sell_pct / 100)
+                sold_capital = initial_capital * (sell_pct / 100)
+                realized_pnl = (sell_val - entry_price) * sold_shares
+                realized_pnl_pct = (realized_pnl / sold_capital) * 100 if sold_capital > 0 else 0
+                remaining_shares = initial_shares - sold_shares
+                remaining_capital = initial_capital - sold_capital
+                if current_price:
+                    current_value = remaining_shares * current_price
+                    unrealized_pnl = current_value - remaining_capital
+                    unrealized_pnl_pct = (unrealized_pnl / remaining_capital) * 100 if remaining_capital > 0 else 0
+                else:
+                    current_value = remaining_capital
+                    unrealized_pnl = 0
+                    unrealized_pnl_pct = 0
+                total_pnl = realized_pnl + unrealized_pnl
+                total_pnl_pct = (total_pnl / initial_capital) * 100
+                return {
+                    'type': 'PARTIAL', 'initial_capital': initial_capital, 'initial_shares': initial_shares,
+                    'remaining_shares': remaining_shares, 'remaining_capital': remaining_capital,
+                    'current_value': current_value, 'realized_pnl': realized_pnl,
+                    'realized_pnl_pct': realized_pnl_pct, 'unrealized_pnl': unrealized_pnl,
+                    'unrealized_pnl_pct': unrealized_pnl_pct, 'total_pnl': total_pnl,
+                    'total_pnl_pct': total_pnl_pct, 'avg_sell_price': sell_val,
+                    'status': f'🟡 Partial ({sell_pct:.0f}% sold)'
+                }
+        
+        if current_price:
+            current_value = initial_shares * current_price
+            unrealized_pnl = current_value - initial_capital
+            unrealized_pnl_pct = (unrealized_pnl / initial_capital) * 100
+        else:
+            current_value = initial_capital
+            unrealized_pnl = 0
+            unrealized_pnl_pct = 0
+        return {
+            'type': 'OPEN', 'initial_capital': initial_capital, 'initial_shares': initial_shares,
+            'remaining_shares': initial_shares, 'remaining_capital': initial_capital,
+            'current_value': current_value, 'realized_pnl': 0, 'realized_pnl_pct': 0,
+            'unrealized_pnl': unrealized_pnl, 'unrealized_pnl_pct': unrealized_pnl_pct,
+            'total_pnl': unrealized_pnl, 'total_pnl_pct': unrealized_pnl_pct,
+            'avg_sell_price': 0, 'status': '🟢 Open'
+        }
+    except:
+        return None
+
+def calculate_positions(trades_df, prices):
+    # Column-oriented calculate_position: prices is aligned with trades_df rows (NaN/0 = no quote)
+    prices = np.asarray(prices, dtype=float)
+    entry_price = pd.to_numeric(trades_df['Entry Price'], errors='coerce').to_numpy(dtype=float)
+    initial_capital = pd.to_numeric(trades_df['Capital'], errors='coerce').to_numpy(dtype=float)
+    sell_pct = pd.to_numeric(trades_df['Sell %'], errors='coerce').fillna(0).to_numpy(dtype=float)
+    sell_price = pd.to_numeric(trades_df['Sell Price'], errors='coerce').to_numpy(dtype=float)
+    trade_status = trades_df['Trade Status'].fillna('').astype(str).str.upper().str.strip().to_numpy()
+    
+    valid = np.isfinite(entry_price) & np.isfinite(initial_capital) & (entry_price != 0) & (initial_capital != 0)
+    has_price = np.isfinite(prices) & (prices != 0)
+    has_sell_price = np.isfinite(sell_price)
+    
+    closed = (trade_status == 'CLOSED') | (sell_pct >= 100)
+    # A partial sell without a sell price is still treated as a fully open position
+    partial = ~closed & (sell_pct > 0) & (sell_pct < 100) & has_sell_price
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        initial_shares = initial_capital / entry_price
+        sell_val = np.where(has_sell_price, sell_price, np.where(has_price, prices, entry_price))
+        sold_fraction = np.where(closed, 1.0, np.where(partial, sell_pct / 100, 0.0))
+        sold_shares = initial_shares * sold_fraction
+        sold_capital = initial_capital * sold_fraction
+        
+        realized_pnl = np.where(closed | partial, (sell_val - entry_price) * sold_shares, 0.0)
+        realized_pnl_pct = np.where(sold_capital > 0, realized_pnl / sold_capital * 100, 0.0)
+        
+        remaining_shares = initial_shares - sold_shares
+        remaining_capital = initial_capital - sold_capital
+        current_value = np.where(closed, 0.0, np.where(has_price, remaining_shares * prices, remaining_capital))
+        unrealized_pnl = np.where(closed, 0.0, current_value - remaining_capital)
+        unrealized_pnl_pct = np.where(remaining_capital > 0, unrealized_pnl / remaining_capital * 100, 0.0)
+        
+        total_pnl = realized_pnl + unrealized_pnl
+        total_pnl_pct = total_pnl / initial_capital * 100
+    
+    position_type = np.where(closed, 'CLOSED', np.where(partial, 'PARTIAL', 'OPEN'))
+    status = np.where(closed, '🔒 Closed', '🟢 Open').astype(object)
+    if partial.any():
+        status[partial] = [f'🟡 Partial ({pct:.0f}% sold)' for pct in sell_pct[partial]]
+    
+    positions = pd.DataFrame({
+        'type': position_type, 'entry_price': entry_price, 'initial_capital': initial_capital, 'initial_shares': initial_shares,
+        'remaining_shares': remaining_shares, 'remaining_capital': remaining_capital,
+        'current_value': current_value, 'realized_pnl': realized_pnl,
+        'realized_pnl_pct': realized_pnl_pct, 'unrealized_pnl': unrealized_pnl,
+        'unrealized_pnl_pct': unrealized_pnl_pct, 'total_pnl': total_pnl,
+        'total_pnl_pct': total_pnl_pct, 'avg_sell_price': np.where(closed | partial, sell_val, 0.0),
+        'status': status
+    }, index=trades_df.index)
+    return positions[valid]
+
+def summarize_positions(positions):
+    closed = positions['type'] == 'CLOSED'
+    total_invested = positions['initial_capital'].sum()
+    total_realized = positions['realized_pnl'].sum()
+    total_unrealized = positions['unrealized_pnl'].sum()
+    total_pnl = total_realized + total_unrealized
+    return {
+        'total_invested': total_invested,
+        'total_current_value': positions['current_value'].sum(),
+        'total_realized': total_realized,
+        'total_unrealized': total_unrealized,
+        'total_pnl': total_pnl,
+        'total_pnl_pct': (total_pnl / total_invested * 100) if total_invested > 0 else 0,
+        'closed_trades': int(closed.sum()),
+        'winning_trades': int((closed & (positions['realized_pnl'] > 0)).sum())
+    }
+
+def _trade_legs(trades_df):
+    """Per-trade entry/exit dates, capital, shares and exit P&L, parsed once for the equity curves."""
+    entry_dates = pd.to_datetime(trades_df['Entry Date'], errors='coerce')
+    entry_price = pd.to_numeric(trades_df['Entry Price'], errors='coerce').to_numpy(dtype=float)
+    capital = pd.to_numeric(trades_df['Capital'], errors='coerce').to_numpy(dtype=float)
+    sell_price = pd.to_numeric(trades_df['Sell Price'], errors='coerce').to_numpy(dtype=float)
+    sell_dates = pd.to_datetime(trades_df['Sell Date'], errors='coerce')
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = capital / entry_price
+    sell_price = np.where(np.isnan(sell_price), entry_price, sell_price)
+    pnl = (sell_price - entry_price) * shares
+    
+    valid = entry_dates.notna().to_numpy() & np.isfinite(shares) & np.isfinite(pnl)
+    return entry_dates[valid], sell_dates[valid], capital[valid], shares[valid], pnl[valid], valid
+
+def _event_days(days, entry_dates, sell_dates):
+    # A trade sold on or before its entry day is realized from the day it appears
+    entry_idx = days.searchsorted(entry_dates)
+    has_sell = sell_dates.notna().to_numpy()
+    sell_idx = np.where(has_sell, days.searchsorted(sell_dates.fillna(days[0])), len(days))
+    return entry_idx, np.maximum(sell_idx, entry_idx)
+
+def _curve_days(entry_dates, start=None, end=None):
+    start_date = entry_dates.min() if start is None else max(entry_dates.min(), pd.Timestamp(start))
+    return pd.date_range(start=start_date, end=end or datetime.now(), freq='D')
+
+def _invested_and_realized(days, entry_idx, sell_idx, capital, pnl):
+    # Capital is held between entry and exit; realized P&L counts from the exit day onward
+    n_days = len(days)
+    capital_delta = (np.bincount(entry_idx, weights=capital, minlength=n_days + 1)
+                     - np.bincount(sell_idx, weights=capital, minlength=n_days + 1))
+    pnl_delta = np.bincount(sell_idx, weights=pnl, minlength=n_days + 1)
+    return np.cumsum(capital_delta)[:n_days], np.cumsum(pnl_delta)[:n_days]
+
+def calculate_equity_curve(trades_df, start=None, end=None):
+    """Daily equity from the first entry (or `start`, if later) through today (or `end`)."""
+    if trades_df.empty:
+        return pd.DataFrame()
+    
+    entry_dates, sell_dates, capital, shares, pnl, _ = _trade_legs(trades_df)
+    if entry_dates.empty:
+        return pd.DataFrame()
+    
+    date_range = _curve_days(entry_dates, start, end)
+    entry_idx, sell_idx = _event_days(date_range, entry_dates, sell_dates)
+    invested, realized = _invested_and_realized(date_range, entry_idx, sell_idx, capital, pnl)
+    equity = np.round(invested + realized, 6)
+    
+    return pd.DataFrame({'Date': date_range, 'Equity': np.where(equity > 0, equity, 0)})
+
+def calculate_daily_snapshots(trades_df, tickers, closes, start=None, end=None):
+    """End-of-day state for each day of calculate_equity_curve's range: (days, positions).
+
+    `days` has the curve's Equity plus invested capital, realized P&L and the mark-to-market value;
+    `positions` has one row per weekday and held ticker. `closes` maps ticker -> Series of daily
+    closes; a ticker without a close yet is valued at cost.
+    """
+    day_columns = ['Date', 'Equity', 'Invested', 'Realized P&L', 'Market Value']
+    position_columns = ['Date', 'Ticker', 'Shares', 'Cost', 'Close', 'Value']
+    empty = pd.DataFrame(columns=day_columns), pd.DataFrame(columns=position_columns)
+    if trades_df.empty:
+        return empty
+    entry_dates, sell_dates, capital, shares, pnl, valid = _trade_legs(trades_df)
+    if entry_dates.empty:
+        return empty
+    days = _curve_days(entry_dates, start, end)
+    if days.empty:
+        return empty
+    n_days = len(days)
+    entry_idx, sell_idx = _event_days(days, entry_dates, sell_dates)
+    invested, realized = _invested_and_realized(days, entry_idx, sell_idx, capital, pnl)
+    equity = np.round(invested + realized, 6)
+    
+    # Holdings per (day, ticker), as in calculate_intraday_equity; open lots are counted so
+    # a fully sold ticker drops out exactly rather than lingering as float residue
+    symbols, col = np.unique(np.asarray(tickers[valid], dtype=str), return_inverse=True)
+    share_delta = np.zeros((n_days + 1, len(symbols)))
+    cost_delta = np.zeros((n_days + 1, len(symbols)))
+    lot_delta = np.zeros((n_days + 1, len(symbols)), dtype=np.int64)
+    np.add.at(share_delta, (entry_idx, col), shares)
+    np.add.at(share_delta, (sell_idx, col), -shares)
+    np.add.at(cost_delta, (entry_idx, col), capital)
+    np.add.at(cost_delta, (sell_idx, col), -capital)
+    np.add.at(lot_delta, (entry_idx, col), 1)
+    np.add.at(lot_delta, (sell_idx, col), -1)
+    held_shares = np.cumsum(share_delta, axis=0)[:n_days]
+    held_cost = np.cumsum(cost_delta, axis=0)[:n_days]
+    held = np.cumsum(lot_delta, axis=0)[:n_days] > 0
+    
+    # Closes carry forward over weekends and holidays, including from before the first day
+    prices = pd.DataFrame({s: closes[s] for s in symbols if s in closes and not closes[s].empty})
+    prices = prices.sort_index().reindex(columns=symbols)
+    if prices.index.empty:
+        day_prices = np.full((n_days, len(symbols)), np.nan)
+    else:
+        day_prices = prices.reindex(days, method='ffill').to_numpy(dtype=float)
+    value = np.where(held, np.where(np.isfinite(day_prices), held_shares * day_prices, held_cost), 0.0)
+    
+    day_idx, sym_idx = np.nonzero(held & (days.dayofweek < 5)[:, None])
+    positions = pd.DataFrame({
+        'Date': days[day_idx],
+        'Ticker': symbols[sym_idx],
+        'Shares': held_shares[day_idx, sym_idx],
+        'Cost': held_cost[day_idx, sym_idx],
+        'Close': day_prices[day_idx, sym_idx],
+        'Value': value[day_idx, sym_idx],
+    })
+    days = pd.DataFrame({
+        'Date': days,
+        'Equity': np.where(equity > 0, equity, 0),
+        'Invested': invested,
+        'Realized P&L': realized,
+        'Market Value': value.sum(axis=1) + realized,
+    })
+    return days, positions
+
+def calculate_intraday_equity(trades_df, tickers, closes):
+    """Mark-to-market equity at every intraday bar: realized P&L plus held shares at the bar's close.
+
+    `closes` maps ticker -> Series of bar closes. Holdings change at day boundaries exactly as in
+    calculate_equity_curve, so at entry prices both curves agree; shares without a price yet are held at cost.
+    """
+    if trades_df.empty or not closes:
+        return pd.DataFrame()
+    prices = pd.DataFrame(closes).sort_index().ffill()
+    if prices.empty:
+        return pd.DataFrame()
+    
+    entry_dates, sell_dates, capital, shares, pnl, valid = _trade_legs(trades_df)
+    bar_days = prices.index.normalize()
+    days = bar_days.unique()
+    n_days = len(days)
+    entry_idx, sell_idx = _event_days(days, entry_dates, sell_dates)
+    
+    # Holdings per (day, ticker); trades in tickers without bars share one extra, never-priced column
+    n_cols = len(prices.columns)
+    col = prices.columns.get_indexer(tickers[valid])
+    col = np.where(col < 0, n_cols, col)
+    share_delta = np.zeros((n_days + 1, n_cols + 1))
+    cost_delta = np.zeros((n_days + 1, n_cols + 1))
+    np.add.at(share_delta, (entry_idx, col), shares)
+    np.add.at(share_delta, (sell_idx, col), -shares)
+    np.add.at(cost_delta, (entry_idx, col), capital)
+    np.add.at(cost_delta, (sell_idx, col), -capital)
+    realized = np.cumsum(np.bincount(sell_idx, weights=pnl, minlength=n_days + 1))[:n_days]
+    
+    day_of_bar = days.get_indexer(bar_days)
+    held_shares = np.cumsum(share_delta, axis=0)[:n_days][day_of_bar]
+    held_cost = np.cumsum(cost_delta, axis=0)[:n_days][day_of_bar]
+    bar_prices = np.column_stack([prices.to_numpy(dtype=float), np.full(len(prices), np.nan)])
+    market_value = np.where(np.isfinite(bar_prices), held_shares * bar_prices, held_cost).sum(axis=1)
+    equity = np.round(market_value + realized[day_of_bar], 6)
+    
+    return pd.DataFrame({'Date': prices.index, 'Equity': np.where(equity > 0, equity, 0)})
+
+def month_end_equity(equity_curve, closed=None):
+    """Last equity of every month. Month ends already in `closed` are reused, only later days are resampled."""
+    equity = equity_curve.set_index('Date')['Equity']
+    if closed is None or closed.empty:
+        return equity.resample('ME').last()
+    # Dates are sorted, so the open tail is found by binary search rather than a full-column mask
+    tail = equity.iloc[equity.index.searchsorted(closed.index[-1], side='right'):]
+    return pd.concat([closed, tail.resample('ME').last()]) if not tail.empty else closed
+
+def monthly_returns_table(month_ends):
+    if month_ends.empty:
+        return pd.DataFrame()
+    previous = month_ends.shift()
+    # First month and months starting from zero equity show 0%, as before
+    returns = (month_ends.pct_change(fill_method=None) * 100).where(previous > 0, 0.0)
+    
+    df_monthly = pd.DataFrame({'Year': month_ends.index.year, 'Month': month_ends.index.month, 'Return': returns.to_numpy()})
+    pivot_table = df_monthly.pivot(index='Year', columns='Month', values='Return').fillna(0)
+    pivot_table = pivot_table.rename(columns={i: month_abbr[i].upper() for i in range(1, 13)})
+    # Monthly returns compound, they don't add up
+    pivot_table['TOTAL'] = ((1 + pivot_table / 100).prod(axis=1) - 1) * 100
+    return pivot_table
+
+def calculate_monthly_performance(trades_df, equity_curve=None, closed_months=None):
+    if equity_curve is None:
+        equity_curve = calculate_equity_curve(trades_df)
+    if equity_curve.empty:
+        return pd.DataFrame()
+    return monthly_returns_table(month_end_equity(equity_curve, closed_months))
+
+def calculate_cagr(start_value, end_value, years):
+    if start_value <= 0 or years <= 0:
+        return 0
+    return ((end_value / start_value) ** (1/years) - 1) * 100
+
+def calculate_sharpe_ratio(returns, risk_free_rate=0.02):
+    if len(returns) < 2:
+        return 0
+    excess_returns = returns - (risk_free_rate / 252)
+    return (excess_returns.mean() / excess_returns.std()) * np.sqrt(252) if excess_returns.std() != 0 else 0
+
+def calculate_max_drawdown(equity_curve):
+    if equity_curve.empty:
+        return 0
+    cummax = equity_curve['Equity'].cummax()
+    drawdown = (equity_curve['Equity'] - cummax) / cummax * 100
+    return drawdown.min()
+
+def filter_by_period(df, period, now=None):
+    if df.empty:
+        return df
+    
+    end_date = pd.Timestamp(now) if now is not None else datetime.now()
+    
+    if period == '1D':
+        start_date = end_date - timedelta(days=1)
+    elif period == '1W':
+        start_date = end_date - timedelta(weeks=1)
+    elif period == '1M':
+        start_date = end_date - timedelta(days=30)
+    elif period == '6M':
+        start_date = end_date - timedelta(days=180)
+    elif period == 'YTD':
+        start_date = datetime(end_date.year, 1, 1)
+    elif period == '1Y':
+        start_date = end_date - timedelta(days=365)
+    elif period == '5Y':
+        start_date = end_date - timedelta(days=365*5)
+    else:  # MAX
+        return df
+    
+    return df[df['Date'] >= start_date]
@@ -0,0 +1,26 @@
+import json
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+# Run by benchmarks.run in a scratch directory holding trades.csv, with TRADES_DB,
+# MARKET_CACHE_DIR, PRICE_STORE_DIR and MARKET_DATA_PROVIDER=fake already in the environment.
+
+
+def main(script, timeout):
+    at = AppTest.from_file(script, default_timeout=timeout)
+    timings = {}
+    for stage in ('app_cold', 'app_warm'):
+        started = time.perf_counter()
+        at.run()
+        timings[stage] = time.perf_counter() - started
+        if at.exception:
+            timings['error'] = str(at.exception[0].message)
+            break
+    # Last line of stdout is what the parent reads
+    print(json.dumps(timings))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1], float(sys.argv[2]) if len(sys.argv) > 2 else 600)
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+LEDGER_HEADER = ['Stock Name', 'Entry Date', 'Entry Price', 'Capital', 'Sell Date', 'Sell Price', 'Sell %',
+                 'Trade Status', 'Sell Target 1', 'Sell Target 2', 'Sell Target 3']
+# Share of rows written in each date format, the way hand-edited trades.csv files end up
+# (dash dates are month-first and often ambiguous, e.g. 08-04-2025, which is how parse_date_strict reads them)
+DATE_STYLES = [('%Y-%m-%d', 0.70), ('%m/%d/%Y', 0.15), ('%m/%d/%y', 0.10), ('%m-%d-%Y', 0.05)]
+STATUS_MIX = {'OPEN': 0.4, 'PARTIAL': 0.2, 'CLOSED': 0.4}
+
+
+def _messy_dates(dates, rng):
+    text = pd.Series('', index=dates.index, dtype=object)
+    style = rng.choice(len(DATE_STYLES), size=len(dates), p=[share for _, share in DATE_STYLES])
+    for i, (fmt, _) in enumerate(DATE_STYLES):
+        mask = (style == i) & dates.notna().to_numpy()
+        text[mask] = dates[mask].dt.strftime(fmt)
+    return text
+
+
+def synthetic_ledger(rows, years=5, tickers=50, seed=0, as_of=None):
+    """A trades.csv-shaped frame with a mix of OPEN/PARTIAL/CLOSED trades and mixed date formats."""
+    rng = np.random.default_rng(seed)
+    as_of = pd.Timestamp(as_of or datetime.now()).normalize()
+    first_day = as_of - pd.DateOffset(years=years)
+    span = max((as_of - first_day).days, 2)
+
+    entry_dates = first_day + pd.to_timedelta(rng.integers(0, span - 1, rows), unit='D')
+    status = rng.choice(list(STATUS_MIX), size=rows, p=list(STATUS_MIX.values()))
+    entry_price = rng.uniform(10, 500, rows).round(2)
+    capital = (rng.integers(5, 200, rows) * 100).astype(float)
+
+    sold = status != 'OPEN'
+    days_left = (as_of - entry_dates).days.to_numpy()
+    held_days = np.minimum((rng.random(rows) * days_left).astype(int) + 1, days_left)
+    sell_dates = pd.Series(entry_dates + pd.to_timedelta(held_days, unit='D')).where(sold)
+    sell_price = np.where(sold, (entry_price * (1 + rng.normal(0.02, 0.15, rows))).clip(0.5).round(2), np.nan)
+    sell_pct = np.select([status == 'CLOSED', status == 'PARTIAL'], [100.0, rng.choice([25.0, 50.0, 75.0], rows)], 0.0)
+
+    ledger = pd.DataFrame({
+        'Stock Name': [f"TK{i:03d}" for i in rng.integers(0, tickers, rows)],
+        'Entry Date': _messy_dates(pd.Series(entry_dates), rng),
+        'Entry Price': entry_price,
+        'Capital': capital,
+        'Sell Date': _messy_dates(sell_dates, rng),
+        'Sell Price': sell_price,
+        'Sell %': sell_pct,
+        # Some rows leave the status blank and let the store derive it from Sell %
+        'Trade Status': np.where(rng.random(rows) < 0.05, '', status),
+        'Sell Target 1': (entry_price * 1.1).round(2),
+        'Sell Target 2': (entry_price * 1.2).round(2),
+        'Sell Target 3': (entry_price * 1.3).round(2),
+    })
+    return ledger[LEDGER_HEADER]
+
+
+def write_ledger(path, rows, years=5, tickers=50, seed=0):
+    ledger = synthetic_ledger(rows, years=years, tickers=tickers, seed=seed)
+    ledger.to_csv(path, index=False)
+    return ledger
@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from analytics import (calculate_position, calculate_positions, summarize_positions,
+                       calculate_equity_curve, calculate_intraday_equity, calculate_monthly_performance)
+from benchmarks.ledger import write_ledger
+from fake_market import fake_history, fake_intraday_bars
+from intraday import period_start
+from trade_manager import TradeManager
+from trade_store import TradeStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SIZES = [10, 1_000, 100_000]
+DEFAULT_YEARS = [1, 5, 10]
+ROW_LOOP_LIMIT = 100_000  # the per-row calculate_position loop is skipped above this
+
+
+def timed(func, repeat=1):
+    """Best wall time of `repeat` calls, and the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench_stages(workdir, rows, years, repeat):
+    stages = {}
+    csv_path = os.path.join(workdir, 'trades.csv')
+    stages['generate'], _ = timed(lambda: write_ledger(csv_path, rows, years=years))
+
+    store = TradeStore(os.path.join(workdir, 'trades.db'), csv_path=None)
+    stages['import_csv'], _ = timed(lambda: store.import_csv(csv_path))
+    # The streaming bulk import (validation, rejects, one transaction) into a store of its own
+    manager = TradeManager(None, db_path=os.path.join(workdir, 'import.db'))
+    stages['import_file'], _ = timed(lambda: manager.import_file(csv_path))
+    stages['load_trades'], trades_df = timed(store.load_frame, repeat)
+
+    tickers = trades_df['Stock Name']
+    quotes = {t: fake_history(t).iloc[-1]['Close'] for t in tickers.unique()}
+    prices = tickers.map(quotes).astype(float)
+
+    if len(trades_df) <= ROW_LOOP_LIMIT:
+        stages['calculate_position'], _ = timed(
+            lambda: [calculate_position(row, prices[idx]) for idx, row in trades_df.iterrows()], repeat)
+    stages['calculate_positions'], positions = timed(lambda: calculate_positions(trades_df, prices), repeat)
+    stages['summarize_positions'], _ = timed(lambda: summarize_positions(positions), repeat)
+    stages['calculate_equity_curve'], curve = timed(lambda: calculate_equity_curve(trades_df), repeat)
+    stages['calculate_monthly_performance'], _ = timed(
+        lambda: calculate_monthly_performance(trades_df, curve), repeat)
+    closes = {t: bars['Close'] for t, bars in fake_intraday_bars(tickers.unique(), period_start('1W'), '5m').items()}
+    stages['calculate_intraday_equity'], _ = timed(lambda: calculate_intraday_equity(trades_df, tickers, closes), repeat)
+    return stages, len(trades_df)
+
+
+def bench_app(workdir, timeout):
+    # A fresh interpreter per ledger so module-level stores and caches start cold
+    env = dict(os.environ, TRADES_DB=os.path.join(workdir, 'app.db'), MARKET_CACHE_DIR=os.path.join(workdir, 'cache'),
+               PRICE_STORE_DIR=os.path.join(workdir, 'prices'), MARKET_DATA_PROVIDER='fake',
+               PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    proc = subprocess.run([sys.executable, '-m', 'benchmarks.app_run', os.path.join(ROOT, 'dashboard.py'), str(timeout)],
+                          cwd=workdir, env=env, capture_output=True, text=True)
+    try:
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        lines = (proc.stderr or proc.stdout).strip().splitlines()
+        return {'error': lines[-1] if lines else 'no output'}
+
+
+def run(sizes, years_list, repeat=3, app=False, app_timeout=600):
+    results = []
+    for years in years_list:
+        for rows in sizes:
+            workdir = tempfile.mkdtemp(prefix='pnl-bench-')
+            try:
+                stages, loaded = bench_stages(workdir, rows, years, repeat)
+                if app:
+                    stages.update(bench_app(workdir, app_timeout))
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+            results.append({'rows': rows, 'years': years, 'loaded_rows': loaded, 'stages': stages})
+            print(f"{rows:>9} rows / {years:>2}y  " + '  '.join(
+                f"{name}={value:.4f}s" for name, value in stages.items() if isinstance(value, float)), flush=True)
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline_path, threshold=None):
+    """Print current/baseline ratios per stage; returns the stages slower than `threshold`."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r['rows'], r['years']): r['stages'] for r in baseline['results']}
+    regressions = []
+    print(f"\ncompared with {baseline['meta']['commit']} ({baseline_path})")
+    for result in current['results']:
+        before = old.get((result['rows'], result['years']))
+        if before is None:
+            continue
+        for stage, seconds in result['stages'].items():
+            if not isinstance(seconds, float) or not isinstance(before.get(stage), float) or before[stage] <= 0:
+                continue
+            ratio = seconds / before[stage]
+            flag = ''
+            if threshold and ratio > threshold:
+                flag = '  <-- slower'
+                regressions.append((result['rows'], result['years'], stage, ratio))
+            print(f"{result['rows']:>9} rows / {result['years']:>2}y  {stage:<30} "
+                  f"{before[stage]:.4f}s -> {seconds:.4f}s  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the ledger pipeline on synthetic trades.csv files.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='ledger row counts')
+    parser.add_argument('--years', type=int, nargs='+', default=DEFAULT_YEARS, help='ledger history lengths')
+    parser.add_argument('--repeat', type=int, default=3, help='best-of count for the calculation stages')
+    parser.add_argument('--app', action='store_true', help='also time a headless dashboard run (Streamlit AppTest)')
+    parser.add_argument('--app-timeout', type=float, default=600)
+    parser.add_argument('--out', help='results file (default benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--threshold', type=float, help='exit non-zero if a stage is this many times slower')
+    args = parser.parse_args()
+
+    current = run(args.sizes, args.years, repeat=args.repeat, app=args.app, app_timeout=args.app_timeout)
+    out = args.out or os.path.join(RESULTS_DIR, f"{current['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"results written to {out}")
+
+    if args.compare and compare(current, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,24 @@
 import streamlit as st
+import json
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 import plotly.graph_objects as go
-import numpy as np
-from calendar import month_abbr
+import instrumentation
+from alerts import AlertEngine
+from analytics import (calculate_positions, summarize_positions, calculate_equity_curve, calculate_monthly_performance,
+                       calculate_intraday_equity, calculate_cagr, filter_by_period)
+from downsample import downsample, WEBGL_THRESHOLD
+from intraday import intraday_bars, INTRADAY_PERIODS, period_start, last_session
+from lots import build_lots, aggregate_lots, summarize_holdings
+from market_data import get_stock_quotes, get_benchmark_history
+from price_store import price_store, exchange_now
+from projection import simulate, daily_returns
+from quote_cache import market_cache, INTRADAY_HISTORY_TTL
+from quote_snapshot import read_snapshot
+from risk import RiskEngine
+from snapshots import SnapshotStore
+from trade_store import TradeStore, DEFAULT_PORTFOLIO, parse_date_column
 
 st.set_page_config(page_title="Trading Analytics Dashboard", page_icon="📊", layout="wide")
 
@@ -84,6 +97,15 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# One store per portfolio partition, shared by every session in the process
+@st.cache_resource(show_spinner=False)
+def get_trade_store(portfolio):
+    return TradeStore(portfolio=portfolio)
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_store():
+    return SnapshotStore(get_trade_store(DEFAULT_PORTFOLIO).path)
+
 st.title("📊 Trading Analytics Dashboard")
 st.markdown("---")
 
@@ -98,268 +120,107 @@ if 'pnl_flash' not in st.session_state:
     st.session_state.pnl_flash = {}
 if 'chart_period' not in st.session_state:
     st.session_state.chart_period = 'MAX'
+if 'alerts_seen' not in st.session_state:
+    st.session_state.alerts_seen = time.time()
 
-def parse_date_strict(date_val):
-    if pd.isna(date_val) or str(date_val).strip() in ['', 'None', 'nan']:
-        return ''
-    date_str = str(date_val).strip()
-    try:
-        parsed = pd.to_datetime(date_str, dayfirst=False, errors='coerce')
-        if pd.notna(parsed):
-            return parsed.strftime('%Y-%m-%d')
-    except:
-        pass
-    formats = ['%Y-%m-%d', '%d/%m/%y', '%d/%m/%Y', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%d-%m-%Y', '%d-%m-%y']
-    for fmt in formats:
-        try:
-            parsed = datetime.strptime(date_str, fmt)
-            if parsed.year < 100:
-                parsed = parsed.replace(year=2000 + parsed.year)
-            return parsed.strftime('%Y-%m-%d')
-        except:
-            continue
-    return ''
-
-def load_trades():
-    try:
-        df = pd.read_csv('trades.csv')
-        df = df.dropna(how='all')
-        required = ['Stock Name', 'Entry Date', 'Entry Price', 'Capital', 'Sell Date', 'Sell Price', 'Sell %', 'Trade Status']
-        for col in required:
-            if col not in df.columns:
-                df[col] = ''
-        df['Entry Date'] = df['Entry Date'].apply(parse_date_strict)
-        df['Sell Date'] = df['Sell Date'].apply(parse_date_strict)
-        return df
-    except FileNotFoundError:
-        df = pd.DataFrame(columns=['Stock Name', 'Entry Date', 'Entry Price', 'Capital', 'Sell Date', 'Sell Price', 'Sell %', 'Trade Status', 'Sell Target 1', 'Sell Target 2', 'Sell Target 3'])
-        df.to_csv('trades.csv', index=False)
-        return df
-
-def get_stock_data(ticker):
-    try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period='2d')
-        if not hist.empty:
-            current_price = round(hist['Close'].iloc[-1], 2)
-            previous_close = round(hist['Close'].iloc[-2], 2) if len(hist) >= 2 else current_price
-            return current_price, previous_close
-        return None, None
-    except:
-        return None, None
-
-def get_benchmark_history(symbol, start_date):
-    try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=start_date, end=datetime.now())
-        if not hist.empty:
-            hist.index = hist.index.tz_localize(None)
-        return hist
-    except:
-        return pd.DataFrame()
-
-def calculate_position(row, current_price):
-    try:
-        entry_price = float(row['Entry Price'])
-        initial_capital = float(row['Capital'])
-        initial_shares = initial_capital / entry_price
-        sell_pct = 0
-        if 'Sell %' in row and row['Sell %'] and str(row['Sell %']).strip():
-            try:
-                sell_pct = float(row['Sell %'])
-            except:
-                sell_pct = 0
-        trade_status = str(row.get('Trade Status', '')).upper().strip()
-        sell_price = row.get('Sell Price', '')
-        
-        if trade_status == 'CLOSED' or sell_pct >= 100:
-            if sell_price and str(sell_price).strip():
-                sell_val = float(sell_price)
-            else:
-                sell_val = current_price if current_price else entry_price
-            realized_pnl = (sell_val - entry_price) * initial_shares
-            realized_pnl_pct = (realized_pnl / initial_capital) * 100
-            return {
-                'type': 'CLOSED', 'initial_capital': initial_capital, 'initial_shares': initial_shares,
-                'remaining_shares': 0, 'remaining_capital': 0, 'current_value': 0,
-                'realized_pnl': realized_pnl, 'realized_pnl_pct': realized_pnl_pct,
-                'unrealized_pnl': 0, 'unrealized_pnl_pct': 0,
-                'total_pnl': realized_pnl, 'total_pnl_pct': realized_pnl_pct,
-                'avg_sell_price': sell_val, 'status': '🔒 Closed'
-            }
-        
-        elif sell_pct > 0 and sell_pct < 100:
-            if not sell_price or not str(sell_price).strip():
-                sell_pct = 0
-            else:
-                sell_val = float(sell_price)
-                sold_shares = initial_shares * (sell_pct / 100)
-                sold_capital = initial_capital * (sell_pct / 100)
-                realized_pnl = (sell_val - entry_price) * sold_shares
-                realized_pnl_pct = (realized_pnl / sold_capital) * 100 if sold_capital > 0 else 0
-                remaining_shares = initial_shares - sold_shares
-                remaining_capital = initial_capital - sold_capital
-                if current_price:
-                    current_value = remaining_shares * current_price
-                    unrealized_pnl = current_value - remaining_capital
-                    unrealized_pnl_pct = (unrealized_pnl / remaining_capital) * 100 if remaining_capital > 0 else 0
-                else:
-                    current_value = remaining_capital
-                    unrealized_pnl = 0
-                    unrealized_pnl_pct = 0
-                total_pnl = realized_pnl + unrealized_pnl
-                total_pnl_pct = (total_pnl / initial_capital) * 100
-                return {
-                    'type': 'PARTIAL', 'initial_capital': initial_capital, 'initial_shares': initial_shares,
-                    'remaining_shares': remaining_shares, 'remaining_capital': remaining_capital,
-                    'current_value': current_value, 'realized_pnl': realized_pnl,
-                    'realized_pnl_pct': realized_pnl_pct, 'unrealized_pnl': unrealized_pnl,
-                    'unrealized_pnl_pct': unrealized_pnl_pct, 'total_pnl': total_pnl,
-                    'total_pnl_pct': total_pnl_pct, 'avg_sell_price': sell_val,
-                    'status': f'🟡 Partial ({sell_pct:.0f}% sold)'
-                }
-        
-        if current_price:
-            current_value = initial_shares * current_price
-            unrealized_pnl = current_value - initial_capital
-            unrealized_pnl_pct = (unrealized_pnl / initial_capital) * 100
-        else:
-            current_value = initial_capital
-            unrealized_pnl = 0
-            unrealized_pnl_pct = 0
-        return {
-            'type': 'OPEN', 'initial_capital': initial_capital, 'initial_shares': initial_shares,
-            'remaining_shares': initial_shares, 'remaining_capital': initial_capital,
-            'current_value': current_value, 'realized_pnl': 0, 'realized_pnl_pct': 0,
-            'unrealized_pnl': unrealized_pnl, 'unrealized_pnl_pct': unrealized_pnl_pct,
-            'total_pnl': unrealized_pnl, 'total_pnl_pct': unrealized_pnl_pct,
-            'avg_sell_price': 0, 'status': '🟢 Open'
-        }
-    except:
-        return None
+# Price-independent results are memoized under the store's data version, so reruns,
+# other sessions and chart period clicks reuse them until the ledger changes
+# (and per portfolio, since the data version includes the portfolio's own revision)
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_trades(portfolio, data_version):
+    return get_trade_store(portfolio).load_frame()
 
-def calculate_equity_curve(trades_df):
-    if trades_df.empty:
-        return pd.DataFrame()
-    
-    valid_dates = pd.to_datetime(trades_df['Entry Date'], errors='coerce').dropna()
-    if valid_dates.empty:
-        return pd.DataFrame()
-    
-    start_date = valid_dates.min()
-    end_date = datetime.now()
-    date_range = pd.date_range(start=start_date, end=end_date, freq='D')
-    
-    equity_data = []
-    
-    for date in date_range:
-        daily_capital = 0
-        daily_pnl = 0
-        
-        for idx, row in trades_df.iterrows():
-            entry_date = pd.to_datetime(row['Entry Date'], errors='coerce')
-            if pd.isna(entry_date) or date < entry_date:
-                continue
-            
-            try:
-                entry_price = float(row['Entry Price'])
-                capital = float(row['Capital'])
-                shares = capital / entry_price
-                
-                sell_date = pd.to_datetime(row['Sell Date'], errors='coerce') if row['Sell Date'] and str(row['Sell Date']).strip() else None
-                
-                if pd.notna(sell_date) and date >= sell_date:
-                    sell_price = float(row['Sell Price']) if row['Sell Price'] and str(row['Sell Price']).strip() else entry_price
-                    pnl = (sell_price - entry_price) * shares
-                    daily_pnl += pnl
-                else:
-                    daily_capital += capital
-            except:
-                continue
-        
-        total_equity = daily_capital + daily_pnl
-        equity_data.append({'Date': date, 'Equity': total_equity if total_equity > 0 else 0})
-    
-    df = pd.DataFrame(equity_data)
-    if not df.empty:
-        df['Date'] = pd.to_datetime(df['Date'])
-    return df
-
-def calculate_monthly_performance(trades_df):
-    equity_curve = calculate_equity_curve(trades_df)
-    if equity_curve.empty:
-        return pd.DataFrame()
-    
-    equity_curve['YearMonth'] = pd.to_datetime(equity_curve['Date']).dt.to_period('M')
-    monthly_equity = equity_curve.groupby('YearMonth').last().reset_index()
-    
-    monthly_returns = []
-    for i in range(len(monthly_equity)):
-        if i == 0:
-            ret = 0
-        else:
-            prev_equity = monthly_equity.iloc[i-1]['Equity']
-            curr_equity = monthly_equity.iloc[i]['Equity']
-            ret = ((curr_equity - prev_equity) / prev_equity * 100) if prev_equity > 0 else 0
-        
-        period = monthly_equity.iloc[i]['YearMonth']
-        monthly_returns.append({'Year': period.year, 'Month': period.month, 'Return': ret})
-    
-    df_monthly = pd.DataFrame(monthly_returns)
-    if df_monthly.empty:
-        return pd.DataFrame()
-    
-    pivot_table = df_monthly.pivot(index='Year', columns='Month', values='Return')
-    pivot_table = pivot_table.fillna(0)
-    
-    month_names = {i: month_abbr[i].upper() for i in range(1, 13)}
-    pivot_table = pivot_table.rename(columns=month_names)
-    pivot_table['TOTAL'] = pivot_table.sum(axis=1)
-    
-    return pivot_table
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_snapshots(portfolio, data_version, as_of):
+    return get_snapshot_store().read(portfolio, before=as_of)
 
-def calculate_cagr(start_value, end_value, years):
-    if start_value <= 0 or years <= 0:
-        return 0
-    return ((end_value / start_value) ** (1/years) - 1) * 100
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_equity_curve(portfolio, data_version, as_of):
+    # Closed days come from the end-of-day snapshots (snapshots.py); only the days after them are computed
+    snapshots = get_snapshots(portfolio, data_version, as_of)
+    live = calculate_equity_curve(load_trades(portfolio, data_version), start=snapshots.live_from, end=as_of)
+    return pd.concat([snapshots.equity, live], ignore_index=True) if not snapshots.equity.empty else live
 
-def calculate_sharpe_ratio(returns, risk_free_rate=0.02):
-    if len(returns) < 2:
-        return 0
-    excess_returns = returns - (risk_free_rate / 252)
-    return (excess_returns.mean() / excess_returns.std()) * np.sqrt(252) if excess_returns.std() != 0 else 0
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_monthly_performance(portfolio, data_version, as_of):
+    # Closed month ends come from the snapshot store; only the curve after the last one is resampled
+    return calculate_monthly_performance(load_trades(portfolio, data_version),
+                                         get_equity_curve(portfolio, data_version, as_of),
+                                         get_snapshots(portfolio, data_version, as_of).month_ends)
 
-def calculate_max_drawdown(equity_curve):
-    if equity_curve.empty:
-        return 0
-    cummax = equity_curve['Equity'].cummax()
-    drawdown = (equity_curve['Equity'] - cummax) / cummax * 100
-    return drawdown.min()
+# Risk state is folded forward day by day: one engine per ledger version, closed days only,
+# with today's still-moving point applied to a throwaway copy on each render
+@st.cache_resource(max_entries=16)
+def get_risk_engine(portfolio, data_version, benchmarks):
+    return RiskEngine(benchmarks)
 
-def filter_by_period(df, period):
-    if df.empty:
-        return df
-    
-    end_date = datetime.now()
-    
-    if period == '1D':
-        start_date = end_date - timedelta(days=1)
-    elif period == '1W':
-        start_date = end_date - timedelta(weeks=1)
-    elif period == '1M':
-        start_date = end_date - timedelta(days=30)
-    elif period == '6M':
-        start_date = end_date - timedelta(days=180)
-    elif period == 'YTD':
-        start_date = datetime(end_date.year, 1, 1)
-    elif period == '1Y':
-        start_date = end_date - timedelta(days=365)
-    elif period == '5Y':
-        start_date = end_date - timedelta(days=365*5)
-    else:  # MAX
-        return df
-    
-    return df[df['Date'] >= start_date]
+def risk_metrics(portfolio, data_version, equity_curve):
+    closes = get_benchmark_closes(portfolio, data_version, equity_curve['Date'].iloc[0])
+    closes = {name: close for name, close in closes.items() if not close.empty}
+    engine = get_risk_engine(portfolio, data_version, tuple(closes))
+    session_start = pd.Timestamp(today)
+    engine.extend(equity_curve[equity_curve['Date'] < session_start], closes)
+    live = equity_curve[equity_curve['Date'] >= session_start]
+    if live.empty:
+        return engine, engine
+    return engine, engine.with_day(live['Date'].iloc[-1], live['Equity'].iloc[-1],
+                                   {name: close.iloc[-1] for name, close in closes.items()})
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def get_projection(portfolio, data_version, as_of, paths, horizon, seed):
+    return simulate(daily_returns(get_equity_curve(portfolio, data_version, as_of)), paths, horizon, seed)
+
+MAX_ALERT_TOASTS = 3
+
+# Targets are re-read when the ledger changes; fired targets survive that through the alert log
+@st.cache_resource(max_entries=16)
+def get_alert_engine(portfolio, data_version, _held, _held_tickers, _positions):
+    return AlertEngine(portfolio, _held, _held_tickers, _positions)
+
+def clear_ledger_caches():
+    load_trades.clear()
+    get_snapshots.clear()
+    get_equity_curve.clear()
+    get_monthly_performance.clear()
+    get_chart_series.clear()
+    get_risk_engine.clear()
+    get_projection.clear()
+    get_alert_engine.clear()
+
+def live_positions(held, held_tickers):
+    # Prefer the price poller's shared snapshot; only tickers it doesn't cover are fetched here
+    with instrumentation.stage('quote_fetch'):
+        quotes, snapshot_at = read_snapshot()
+        # Closed trades are valued at their sell price, so tickers with nothing left open aren't fetched
+        sell_pct = pd.to_numeric(held['Sell %'], errors='coerce').fillna(0)
+        closed = (held['Trade Status'] == 'CLOSED') | (sell_pct >= 100)
+        settled = closed & pd.to_numeric(held['Sell Price'], errors='coerce').notna()
+        missing = [t for t in held_tickers[~settled].unique() if t not in quotes]
+        if missing:
+            quotes.update(get_stock_quotes(missing))
+    with instrumentation.stage('position_calc'):
+        prices = held_tickers.map(lambda t: quotes.get(t, (None, None))[0]).astype(float)
+        positions = calculate_positions(held, prices)
+        # Lots of the same ticker roll up into one holding (FIFO realized P&L, average cost)
+        lots = build_lots(held, held_tickers, positions)
+        holdings = aggregate_lots(lots, {t: q.price for t, q in quotes.items()})
+        # Trade counts stay per lot; money totals follow the holdings
+        totals = {**summarize_positions(positions), **summarize_holdings(holdings)}
+    instrumentation.track_frame('positions', positions)
+    return quotes, snapshot_at, positions, holdings, lots, totals
+
+# Portfolios are separate partitions of the trade store; quotes are shared by all of them
+def create_portfolio():
+    name = get_trade_store(DEFAULT_PORTFOLIO).create_portfolio(st.session_state.new_portfolio)
+    if name:
+        st.session_state.portfolio = name
+    st.session_state.new_portfolio = ''
+
+with st.sidebar:
+    portfolio = st.selectbox("📁 Portfolio", get_trade_store(DEFAULT_PORTFOLIO).portfolios(), key="portfolio")
+    st.text_input("New portfolio", key="new_portfolio")
+    st.button("➕ Create", on_click=create_portfolio)
+trade_store = get_trade_store(portfolio)
 
 # Controls
 col1, col2 = st.columns([1, 2])
@@ -370,36 +231,64 @@ with col2:
 
 st.markdown("---")
 
-trades_df = load_trades()
+# ?debug=1 (or DASHBOARD_DEBUG=1) turns on stage timers and the debug panel at the bottom
+debug = instrumentation.ENABLED or st.query_params.get('debug') == '1'
+run_metrics = instrumentation.start_run(debug)
 
-if not trades_df.empty:
-    total_invested = 0
-    total_current_value = 0
-    total_realized = 0
-    total_unrealized = 0
-    closed_trades = []
+data_version = f"{trade_store.path}:{portfolio}:{trade_store.revision()}:{get_snapshot_store().version(portfolio)}"
+# The exchange's date, the same clock snapshots.last_closed_day() closes days on
+today = exchange_now().date()
+with instrumentation.stage('load_trades'):
+    trades_df = load_trades(portfolio, data_version)
+instrumentation.track_frame('trades', trades_df)
+
+# Only the live sections below re-run on the refresh timer; the ledger analytics are
+# re-rendered when the trades or the chart period change, not on every tick
+live_every = refresh_interval if auto_refresh else None
+# A full run starts a fresh tick for both live fragments
+st.session_state.pop('live_tick', None)
+
+def tick_positions(held, held_tickers):
+    # Both live fragments refresh on the same timer: whichever runs first prices the tick and
+    # the other reuses it, so quotes are fetched once and both panels show the same totals
+    key = (portfolio, data_version)
+    tick = st.session_state.get('live_tick')
+    if tick and tick[0] == key and (live_every is None or time.time() - tick[1] < live_every / 2):
+        return tick[2]
+    result = live_positions(held, held_tickers)
+    st.session_state.live_tick = (key, time.time(), result)
+    return result
+
+@st.fragment(run_every=live_every)
+def positions_section(held, held_tickers):
+    quotes, snapshot_at, positions, holdings, lots, totals = tick_positions(held, held_tickers)
+    alert_engine = get_alert_engine(portfolio, data_version, held, held_tickers, positions)
+    with instrumentation.stage('alerts'):
+        # Last-known prices from missed fetches are not fresh ticks, so they don't trigger targets
+        alert_engine.evaluate({t: q.price for t, q in quotes.items() if not q.stale})
+    alert_feed = alert_engine.recent()
+    # The engine is shared, so each session toasts whatever fired since it last looked
+    new_alerts = [a for a in alert_feed if a.time > st.session_state.alerts_seen]
+    for alert in reversed(new_alerts[:MAX_ALERT_TOASTS]):
+        st.toast(f"🎯 {alert.ticker} hit Sell Target {alert.level} (${alert.target:,.2f}) at ${alert.price:,.2f}")
+    if len(new_alerts) > MAX_ALERT_TOASTS:
+        st.toast("🎯 More sell targets hit — see Target Alerts")
+    if alert_feed:
+        st.session_state.alerts_seen = max(st.session_state.alerts_seen, alert_feed[0].time)
+    total_invested = totals['total_invested']
+    total_current_value = totals['total_current_value']
+    total_realized = totals['total_realized']
+    total_unrealized = totals['total_unrealized']
+    total_pnl = totals['total_pnl']
+    total_pnl_pct = totals['total_pnl_pct']
     
     display_data = []
     
-    for idx, row in trades_df.iterrows():
-        ticker = str(row['Stock Name']).strip().upper()
-        if not ticker or ticker == 'NAN' or ticker == '0':
-            continue
-        
-        entry_price = float(row['Entry Price'])
-        entry_date = row.get('Entry Date', '')
-        current_price, previous_close = get_stock_data(ticker)
-        pos = calculate_position(row, current_price)
-        if not pos:
-            continue
-        
-        total_invested += pos['initial_capital']
-        total_current_value += pos['current_value']
-        total_realized += pos['realized_pnl']
-        total_unrealized += pos['unrealized_pnl']
-        
-        if pos['type'] == 'CLOSED':
-            closed_trades.append({'pnl': pos['realized_pnl'], 'pnl_pct': pos['realized_pnl_pct']})
+    for ticker, pos in holdings.to_dict('index').items():
+        entry_date = pos['first_entry']
+        entry_date = entry_date.strftime('%Y-%m-%d') if pd.notna(entry_date) else ''
+        quote = quotes.get(ticker)
+        current_price, previous_close = (quote.price, quote.previous_close) if quote else (None, None)
         
         # Track price changes for FLASHING
         price_flash_class = ''
@@ -420,18 +309,19 @@ if not trades_df.empty:
         # Track P&L changes for FLASHING
         pnl_flash_class = ''
         current_pnl = pos['total_pnl']
-        if ticker in st.session_state.previous_pnl:
-            prev_pnl = st.session_state.previous_pnl[ticker]
+        pnl_key = f"{portfolio}:{ticker}"
+        if pnl_key in st.session_state.previous_pnl:
+            prev_pnl = st.session_state.previous_pnl[pnl_key]
             if current_pnl > prev_pnl:
                 pnl_flash_class = 'price-flash-up'
-                st.session_state.pnl_flash[ticker] = '🟢'
+                st.session_state.pnl_flash[pnl_key] = '🟢'
             elif current_pnl < prev_pnl:
                 pnl_flash_class = 'price-flash-down'
-                st.session_state.pnl_flash[ticker] = '🔴'
+                st.session_state.pnl_flash[pnl_key] = '🔴'
             else:
                 pnl_flash_class = ''
-                st.session_state.pnl_flash[ticker] = '⚪'
-        st.session_state.previous_pnl[ticker] = current_pnl
+                st.session_state.pnl_flash[pnl_key] = '⚪'
+        st.session_state.previous_pnl[pnl_key] = current_pnl
         
         # Day change
         if current_price and previous_close:
@@ -441,20 +331,24 @@ if not trades_df.empty:
         else:
             day_str = "N/A"
         
-        # Add flash indicator to price
-        price_display = f"{st.session_state.price_flash.get(ticker, '')} ${current_price:.2f}" if current_price else 'N/A'
+        # Add flash indicator to price; a last-known price from a missed fetch is marked stale instead
+        if quote and quote.stale:
+            price_display = f"⏳ ${current_price:.2f} (stale)"
+        else:
+            price_display = f"{st.session_state.price_flash.get(ticker, '')} ${current_price:.2f}" if current_price else 'N/A'
         
         # Add flash indicator to P&L
-        pnl_display = f"{st.session_state.pnl_flash.get(ticker, '')} ${pos['total_pnl']:,.2f} ({pos['total_pnl_pct']:.2f}%)"
+        pnl_display = f"{st.session_state.pnl_flash.get(pnl_key, '')} ${pos['total_pnl']:,.2f} ({pos['total_pnl_pct']:.2f}%)"
         
         display_data.append({
             'Ticker': ticker,
+            'Lots': pos['lots'],
             'Entry Date': entry_date,
-            'Entry Price': f"${entry_price:.2f}",
+            'Avg Cost': f"${pos['avg_cost']:.2f}" if pd.notna(pos['avg_cost']) else '-',
             'Current Price': price_display,
             'Today Change': day_str if pos['type'] != 'CLOSED' else 'Closed',
-            'Initial Capital': f"${pos['initial_capital']:,.2f}",
-            'Remaining Capital': f"${pos['remaining_capital']:,.2f}",
+            'Initial Capital': f"${pos['cost']:,.2f}",
+            'Remaining Capital': f"${pos['remaining_cost']:,.2f}",
             'Current Value': f"${pos['current_value']:,.2f}",
             'Realized P&L': f"${pos['realized_pnl']:,.2f} ({pos['realized_pnl_pct']:.2f}%)",
             'Unrealized P&L': f"${pos['unrealized_pnl']:,.2f} ({pos['unrealized_pnl_pct']:.2f}%)",
@@ -462,9 +356,6 @@ if not trades_df.empty:
             'Status': pos['status']
         })
     
-    total_pnl = total_realized + total_unrealized
-    total_pnl_pct = (total_pnl / total_invested * 100) if total_invested > 0 else 0
-    
     # POSITIONS TABLE
     st.subheader("💼 Current Positions")
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -482,55 +373,56 @@ if not trades_df.empty:
     if display_data:
         df_display = pd.DataFrame(display_data)
         st.dataframe(df_display, use_container_width=True, height=300, hide_index=True)
-    
-    st.caption(f"⏰ Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    st.markdown("---")
-    
-    # EDIT TRADES
-    with st.expander("✏️ Edit Trades"):
-        edited_df = st.data_editor(trades_df, num_rows="dynamic", use_container_width=True, hide_index=True)
-        col1, col2 = st.columns([1, 5])
-        with col1:
-            if st.button("💾 Save", type="primary"):
-                edited_df = edited_df.dropna(subset=['Stock Name', 'Entry Price', 'Capital'])
-                edited_df['Entry Date'] = edited_df['Entry Date'].apply(parse_date_strict)
-                edited_df['Sell Date'] = edited_df['Sell Date'].apply(parse_date_strict)
-                edited_df.to_csv('trades.csv', index=False)
-                st.success("✅ Saved!")
-                time.sleep(0.5)
-                st.rerun()
-    
-    st.markdown("---")
-    st.markdown("---")
-    
-    # PERFORMANCE ANALYTICS
-    st.subheader("📊 Performance Analytics")
-    
-    equity_curve = calculate_equity_curve(trades_df)
-    
-    if not equity_curve.empty and len(equity_curve) > 1:
-        start_equity = total_invested
-        end_equity = total_invested + total_pnl
-        days_trading = (datetime.now() - pd.to_datetime(trades_df['Entry Date'].min())).days
-        years_trading = max(days_trading / 365, 0.01)
-        cagr = calculate_cagr(start_equity, end_equity, years_trading)
         
-        daily_returns = equity_curve['Equity'].pct_change().dropna()
-        sharpe = calculate_sharpe_ratio(daily_returns)
-        max_dd = calculate_max_drawdown(equity_curve)
+        with st.expander("🔍 Lots"):
+            lot_ticker = st.selectbox("Ticker", list(holdings.index), key="lot_ticker")
+            ticker_lots = lots[lots['ticker'] == lot_ticker]
+            st.dataframe(pd.DataFrame({
+                'Entry Date': ticker_lots['entry_date'].dt.strftime('%Y-%m-%d').fillna(''),
+                'Entry Price': ticker_lots['entry_price'].map('${:.2f}'.format),
+                'Shares': ticker_lots['shares'].round(4),
+                'Capital': ticker_lots['cost'].map('${:,.2f}'.format),
+                'Sold (ledger)': ticker_lots['sold_shares'].round(4),
+                'Sold (FIFO)': ticker_lots['fifo_sold'].round(4),
+                'Held (FIFO)': ticker_lots['fifo_remaining'].round(4),
+                'Status': ticker_lots['status'],
+            }), use_container_width=True, hide_index=True)
+    
+    if alert_feed:
+        with st.expander(f"🎯 Target Alerts ({len(alert_feed)})"):
+            st.dataframe(pd.DataFrame({
+                'Time': [datetime.fromtimestamp(a.time).strftime('%Y-%m-%d %H:%M:%S') for a in alert_feed],
+                'Ticker': [a.ticker for a in alert_feed],
+                'Target': [f"Sell Target {a.level}" for a in alert_feed],
+                'Target Price': [f"${a.target:,.2f}" for a in alert_feed],
+                'Price': [f"${a.price:,.2f}" for a in alert_feed],
+            }), use_container_width=True, hide_index=True)
+    
+    if snapshot_at:
+        st.caption(f"⏰ Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} · quotes from price poller at {datetime.fromtimestamp(snapshot_at).strftime('%H:%M:%S')}")
+    else:
+        st.caption(f"⏰ Last Updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+@st.fragment(run_every=live_every)
+def headline_metrics(held, held_tickers, has_curve, first_entry, sharpe, max_dd):
+    # Sharpe and drawdown come from the cached equity curve; only the price-dependent numbers are live
+    _, _, positions, _, _, totals = tick_positions(held, held_tickers)
+    total_pnl_pct = totals['total_pnl_pct']
+    if has_curve:
+        days_trading = (exchange_now() - pd.to_datetime(first_entry)).days
+        years_trading = max(days_trading / 365, 0.01)
+        cagr = calculate_cagr(totals['total_invested'], totals['total_invested'] + totals['total_pnl'], years_trading)
     else:
         cagr = 0
-        sharpe = 0
-        max_dd = 0
     
-    win_rate = (len([t for t in closed_trades if t['pnl'] > 0]) / len(closed_trades) * 100) if closed_trades else 0
+    win_rate = (totals['winning_trades'] / totals['closed_trades'] * 100) if totals['closed_trades'] else 0
     
     # METRICS
     col1, col2, col3, col4, col5, col6 = st.columns(6)
     with col1:
         st.metric("Net Profit", f"{total_pnl_pct:.1f}%")
     with col2:
-        st.metric("Total Trades", len(display_data))
+        st.metric("Total Trades", len(positions))
     with col3:
         st.metric("Win Rate", f"{win_rate:.1f}%")
     with col4:
@@ -539,27 +431,124 @@ if not trades_df.empty:
         st.metric("Sharpe Ratio", f"{sharpe:.2f}")
     with col6:
         st.metric("Max Drawdown", f"{max_dd:.1f}%")
-    
-    st.markdown("---")
-    
-    # MONTHLY PERFORMANCE
-    st.subheader("📅 Monthly Performance")
-    monthly_perf = calculate_monthly_performance(trades_df)
-    
-    if not monthly_perf.empty:
-        def color_negative_red(val):
-            if isinstance(val, (int, float)):
-                color = '#00ff88' if val > 0 else '#ff4444' if val < 0 else 'white'
-                return f'color: {color}; font-weight: bold'
-            return ''
-        
-        styled_monthly = monthly_perf.style.map(color_negative_red)
-        st.dataframe(styled_monthly, use_container_width=True, height=200)
-    else:
-        st.info("Add more trades!")
-    
-    st.markdown("---")
-    
+
+def risk_section(engine, live):
+    metrics = live.metrics()
+    st.markdown("#### 🛡️ Risk")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Volatility (ann.)", f"{metrics['volatility']:.1f}%")
+    with col2:
+        rolling = metrics['rolling_sharpe']
+        st.metric(f"Sharpe ({engine.window}d)", f"{rolling:.2f}" if pd.notna(rolling) else "—")
+    with col3:
+        st.metric("Longest Drawdown", f"{metrics['max_drawdown_days']} days")
+    with col4:
+        st.metric("Current Drawdown", f"{metrics['current_drawdown']:.1f}%",
+                  f"{metrics['current_drawdown_days']} days" if metrics['current_drawdown_days'] else None,
+                  delta_color="off")
+    
+    if metrics['benchmarks']:
+        fmt = lambda value, spec: format(value, spec) if pd.notna(value) else "—"
+        relative = pd.DataFrame([
+            {'Benchmark': name, 'Beta': fmt(stats['beta'], '.2f'), 'Alpha (ann.)': fmt(stats['alpha'], '+.2f') + '%',
+             'Correlation': fmt(stats['correlation'], '.2f')}
+            for name, stats in metrics['benchmarks'].items()
+        ])
+        st.dataframe(relative, use_container_width=True, hide_index=True)
+    
+    rolling = engine.rolling_frame().dropna(subset=['Rolling Volatility'])
+    if not rolling.empty:
+        fig = go.Figure()
+        x, y = downsample(rolling['Date'], rolling['Rolling Sharpe'])
+        fig.add_trace(chart_trace(x)(x=x, y=y, mode='lines', name=f'Sharpe ({engine.window}d)',
+                                     line=dict(color='#00ff88', width=2)))
+        x, y = downsample(rolling['Date'], rolling['Rolling Volatility'])
+        fig.add_trace(chart_trace(x)(x=x, y=y, mode='lines', name=f'Volatility ({engine.window}d, %)', yaxis='y2',
+                                     line=dict(color='#f59e0b', width=2, dash='dot')))
+        fig.update_layout(
+            template='plotly_dark',
+            height=300,
+            margin=dict(l=0, r=0, t=30, b=0),
+            hovermode='x unified',
+            yaxis=dict(title='Sharpe'),
+            yaxis2=dict(title='Volatility (%)', overlaying='y', side='right'),
+            legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="center", x=0.5)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+def set_chart_period(period):
+    st.session_state.chart_period = period
+
+# Returns come from the full series; only what is drawn is decimated, so the chart payload
+# stays around CHART_POINT_BUDGET points per trace however long the history is
+BENCHMARKS = [('S&P 500', 'SPY'), ('NASDAQ', 'QQQ')]
+
+def get_benchmark_closes(portfolio, data_version, start_date):
+    # Snapshotted days are read back; only the bars after them go through the price store
+    snapshots = get_snapshots(portfolio, data_version, today)
+    closes = {}
+    for name, symbol in BENCHMARKS:
+        stored = snapshots.benchmarks.get(symbol, pd.Series(dtype=float)).loc[start_date:]
+        live_from = max(snapshots.live_from, start_date) if not stored.empty else start_date
+        live = get_benchmark_history(symbol, live_from).get('Close', pd.Series(dtype=float))
+        closes[name] = pd.concat([stored, live]) if not stored.empty else live
+    return closes
+
+def normalized_series(dates, equity, benchmark_closes):
+    series = {'Portfolio': downsample(dates, equity / equity.iloc[0] * 100)}
+    returns = {'Portfolio': (equity.iloc[-1] - equity.iloc[0]) / equity.iloc[0] * 100}
+    for name, close in benchmark_closes.items():
+        if not close.empty:
+            series[name] = downsample(close.index, close / close.iloc[0] * 100)
+            returns[name] = (close.iloc[-1] - close.iloc[0]) / close.iloc[0] * 100
+    return series, returns
+
+@st.cache_data(show_spinner=False, max_entries=64, ttl=INTRADAY_HISTORY_TTL)
+def get_chart_series(portfolio, data_version, as_of, period):
+    filtered_equity = filter_by_period(get_equity_curve(portfolio, data_version, as_of), period, exchange_now())
+    if filtered_equity.empty:
+        return None
+    start_date = filtered_equity['Date'].min()
+    with instrumentation.stage('benchmark_history'):
+        closes = get_benchmark_closes(portfolio, data_version, start_date)
+    return normalized_series(filtered_equity['Date'], filtered_equity['Equity'], closes)
+
+def get_intraday_chart_series(portfolio, data_version, period):
+    # Not memoized: bars are appended to intraday_bars incrementally and each refresh shows the latest one
+    interval = INTRADAY_PERIODS[period][0]
+    start = period_start(period)
+    trades_df = load_trades(portfolio, data_version)
+    tickers = trades_df['Stock Name'].astype(str).str.strip().str.upper()
+    sell_dates = pd.to_datetime(trades_df['Sell Date'], errors='coerce')
+    # Only tickers held at some point in the window need bars
+    in_window = (sell_dates.isna() | (sell_dates >= start)) & ~tickers.isin(['', 'NAN', '0'])
+    with instrumentation.stage('intraday_bars'):
+        closes = intraday_bars.closes(tickers[in_window].unique(), start, interval)
+        benchmark_bars = intraday_bars.closes([symbol for _, symbol in BENCHMARKS], start, interval)
+    with instrumentation.stage('intraday_equity'):
+        curve = calculate_intraday_equity(trades_df, tickers, closes)
+    if curve.empty:
+        return None
+    if period == '1D':
+        curve = last_session(curve)
+    first = curve['Date'].iloc[0]
+    benchmark_closes = {name: benchmark_bars[symbol].loc[first:] for name, symbol in BENCHMARKS if symbol in benchmark_bars}
+    return normalized_series(curve['Date'], curve['Equity'], benchmark_closes)
+
+def chart_refresh_every():
+    # Intraday periods follow the live refresh timer; daily periods only re-run when clicked
+    return live_every if st.session_state.chart_period in INTRADAY_PERIODS else None
+
+def chart_trace(x):
+    # WebGL draws long traces without an SVG path per point
+    return go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+
+chart_every = chart_refresh_every()
+
+@st.fragment(run_every=chart_every)
+def equity_chart_section(equity_curve):
+    # Switching the period re-runs only this fragment
     # EQUITY CURVE WITH BENCHMARKS
     st.subheader("📈 Equity Curve vs Benchmarks")
     
@@ -569,42 +558,32 @@ if not trades_df.empty:
     
     for col, period in zip([col1, col2, col3, col4, col5, col6, col7, col8], periods):
         with col:
-            if st.button(period, key=f"period_{period}"):
-                st.session_state.chart_period = period
-                st.rerun()
+            st.button(period, key=f"period_{period}", on_click=set_chart_period, args=(period,))
+    
+    if chart_refresh_every() != chart_every:
+        # Moving between intraday and daily periods changes the fragment's timer, which needs a full run
+        st.rerun()
     
     if not equity_curve.empty:
-        filtered_equity = filter_by_period(equity_curve, st.session_state.chart_period)
+        chart = None
+        if st.session_state.chart_period in INTRADAY_PERIODS:
+            chart = get_intraday_chart_series(portfolio, data_version, st.session_state.chart_period)
+        if chart is None:
+            # No intraday bars (offline, provider down): fall back to the daily curve
+            chart = get_chart_series(portfolio, data_version, today, st.session_state.chart_period)
         
-        if not filtered_equity.empty:
-            start_date = filtered_equity['Date'].min()
-            
-            spy_hist = get_benchmark_history('SPY', start_date)
-            qqq_hist = get_benchmark_history('QQQ', start_date)
-            
-            portfolio_start_value = filtered_equity['Equity'].iloc[0]
-            portfolio_end_value = filtered_equity['Equity'].iloc[-1]
-            portfolio_return = ((portfolio_end_value - portfolio_start_value) / portfolio_start_value) * 100
-            
-            spy_return = 0
-            if not spy_hist.empty and len(spy_hist) > 0:
-                spy_start_value = spy_hist['Close'].iloc[0]
-                spy_end_value = spy_hist['Close'].iloc[-1]
-                spy_return = ((spy_end_value - spy_start_value) / spy_start_value) * 100
-            
-            qqq_return = 0
-            if not qqq_hist.empty and len(qqq_hist) > 0:
-                qqq_start_value = qqq_hist['Close'].iloc[0]
-                qqq_end_value = qqq_hist['Close'].iloc[-1]
-                qqq_return = ((qqq_end_value - qqq_start_value) / qqq_start_value) * 100
-            
-            filtered_equity['Normalized'] = (filtered_equity['Equity'] / portfolio_start_value) * 100
+        if chart is not None:
+            series, returns = chart
+            portfolio_return = returns['Portfolio']
+            spy_return = returns.get('S&P 500', 0)
+            qqq_return = returns.get('NASDAQ', 0)
             
             fig = go.Figure()
             
-            fig.add_trace(go.Scatter(
-                x=filtered_equity['Date'],
-                y=filtered_equity['Normalized'],
+            x, y = series['Portfolio']
+            fig.add_trace(chart_trace(x)(
+                x=x,
+                y=y,
                 mode='lines',
                 name=f'Portfolio ({portfolio_return:+.2f}%)',
                 line=dict(color='#00ff88', width=3),
@@ -612,21 +591,21 @@ if not trades_df.empty:
                 fillcolor='rgba(0, 255, 136, 0.1)'
             ))
             
-            if not spy_hist.empty:
-                spy_normalized = (spy_hist['Close'] / spy_start_value) * 100
-                fig.add_trace(go.Scatter(
-                    x=spy_hist.index,
-                    y=spy_normalized,
+            if 'S&P 500' in series:
+                x, y = series['S&P 500']
+                fig.add_trace(chart_trace(x)(
+                    x=x,
+                    y=y,
                     mode='lines',
                     name=f'S&P 500 ({spy_return:+.2f}%)',
                     line=dict(color='#3b82f6', width=2, dash='dash')
                 ))
             
-            if not qqq_hist.empty:
-                qqq_normalized = (qqq_hist['Close'] / qqq_start_value) * 100
-                fig.add_trace(go.Scatter(
-                    x=qqq_hist.index,
-                    y=qqq_normalized,
+            if 'NASDAQ' in series:
+                x, y = series['NASDAQ']
+                fig.add_trace(chart_trace(x)(
+                    x=x,
+                    y=y,
                     mode='lines',
                     name=f'NASDAQ ({qqq_return:+.2f}%)',
                     line=dict(color='#f59e0b', width=2, dash='dot')
@@ -663,10 +642,152 @@ if not trades_df.empty:
             st.info(f"No data for {st.session_state.chart_period}")
     else:
         st.info("Add trades!")
+
+PROJECTION_HORIZONS = {'3M': 63, '6M': 126, '1Y': 252, '2Y': 504}
+PROJECTION_PATHS = [10_000, 50_000]
+
+@st.fragment
+def projection_section(equity_curve):
+    # Forward bootstrap of the curve's daily returns; runs on request, then reruns hit the cache
+    st.subheader("🔮 Projection")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        horizon_label = st.selectbox("Horizon", list(PROJECTION_HORIZONS), index=2, key="projection_horizon")
+    with col2:
+        paths = st.selectbox("Paths", PROJECTION_PATHS, format_func=lambda n: f"{n:,}", key="projection_paths")
+    with col3:
+        seed = int(st.number_input("Seed", min_value=0, value=42, step=1, key="projection_seed"))
+    with col4:
+        if st.button("🎲 Simulate", key="projection_run"):
+            st.session_state.projection_on = True
+    
+    if not st.session_state.get('projection_on'):
+        st.caption("Resamples past daily returns into thousands of possible paths.")
+        return
+    horizon = PROJECTION_HORIZONS[horizon_label]
+    with instrumentation.stage('projection'):
+        projection = get_projection(portfolio, data_version, today, paths, horizon, seed)
+    if projection is None:
+        st.info("Add more trades!")
+        return
     
-    if auto_refresh:
-        time.sleep(refresh_interval)
-        st.rerun()
+    start_value = equity_curve['Equity'].iloc[-1]
+    bands = projection.bands * start_value
+    dates = pd.bdate_range(today, periods=horizon + 1)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Median Outcome", f"${bands['p50'].iloc[-1]:,.0f}", f"{(projection.final['p50'] - 1) * 100:+.1f}%")
+    with col2:
+        st.metric("5th Percentile", f"${bands['p5'].iloc[-1]:,.0f}", f"{(projection.final['p5'] - 1) * 100:+.1f}%")
+    with col3:
+        st.metric("Chance of Loss", f"{projection.loss_probability * 100:.1f}%")
+    with col4:
+        st.metric("Median Max Drawdown", f"{projection.median_drawdown * 100:.1f}%")
+    
+    fig = go.Figure()
+    for low, high, color, name in (('p5', 'p95', 'rgba(0, 255, 136, 0.12)', '5–95%'),
+                                   ('p25', 'p75', 'rgba(0, 255, 136, 0.25)', '25–75%')):
+        fig.add_trace(go.Scatter(x=dates, y=bands[low], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=dates, y=bands[high], mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor=color, name=name, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=dates, y=bands['p50'], mode='lines', name='Median', line=dict(color='#00ff88', width=3)))
+    fig.update_layout(
+        template='plotly_dark',
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0),
+        yaxis_title='Portfolio Value ($)',
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="top", y=-0.15, xanchor="center", x=0.5)
+    )
+    st.plotly_chart(fig, use_container_width=True)
+    
+    drawdowns = pd.DataFrame([
+        {'Max Drawdown Worse Than': f"-{level * 100:.0f}%", 'Probability': f"{probability * 100:.1f}%"}
+        for level, probability in projection.drawdown_probability.items()
+    ])
+    st.dataframe(drawdowns, use_container_width=True, hide_index=True)
+    st.caption(f"{projection.paths:,} paths · {horizon} trading days · seed {projection.seed}")
+
+if not trades_df.empty:
+    tickers = trades_df['Stock Name'].astype(str).str.strip().str.upper()
+    held = trades_df[~tickers.isin(['', 'NAN', '0'])]
+    held_tickers = tickers[held.index]
+    
+    # Keep daily bars for every holding in the local price store for mark-to-market history
+    first_entry = pd.to_datetime(held['Entry Date'], errors='coerce').min()
+    if pd.notna(first_entry):
+        with instrumentation.stage('history_sync'):
+            price_store.sync(held_tickers.unique(), first_entry)
+    
+    positions_section(held, held_tickers)
+    st.markdown("---")
+    
+    # EDIT TRADES
+    with st.expander("✏️ Edit Trades"):
+        edited_df = st.data_editor(trades_df, num_rows="dynamic", use_container_width=True, hide_index=True,
+                                   column_config={'id': None})
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            if st.button("💾 Save", type="primary"):
+                edited_df = edited_df.dropna(subset=['Stock Name', 'Entry Price', 'Capital'])
+                edited_df['Entry Date'] = parse_date_column(edited_df['Entry Date'])
+                edited_df['Sell Date'] = parse_date_column(edited_df['Sell Date'])
+                trade_store.save_frame(edited_df)
+                # Snapshots from the earliest edited date on are recomputed; earlier days are kept
+                get_snapshot_store().rebuild(portfolio)
+                clear_ledger_caches()
+                st.success("✅ Saved!")
+                time.sleep(0.5)
+                st.rerun()
+    
+    st.markdown("---")
+    st.markdown("---")
+    
+    # PERFORMANCE ANALYTICS
+    st.subheader("📊 Performance Analytics")
+    
+    with instrumentation.stage('equity_curve'):
+        equity_curve = get_equity_curve(portfolio, data_version, today)
+    instrumentation.track_frame('equity_curve', equity_curve)
+    if not equity_curve.empty:
+        with instrumentation.stage('risk_metrics'):
+            risk_engine, live_risk = risk_metrics(portfolio, data_version, equity_curve)
+        sharpe = live_risk.sharpe
+        max_dd = live_risk.max_drawdown
+    else:
+        sharpe = 0
+        max_dd = 0
+    headline_metrics(held, held_tickers, len(equity_curve) > 1, trades_df['Entry Date'].min(), sharpe, max_dd)
+    if not equity_curve.empty:
+        risk_section(risk_engine, live_risk)
+    
+    st.markdown("---")
+    
+    # MONTHLY PERFORMANCE
+    st.subheader("📅 Monthly Performance")
+    with instrumentation.stage('monthly_perf'):
+        monthly_perf = get_monthly_performance(portfolio, data_version, today)
+    
+    if not monthly_perf.empty:
+        def color_negative_red(table):
+            # One styles frame for the whole heatmap instead of a Python call per cell
+            styles = pd.DataFrame('color: white; font-weight: bold', index=table.index, columns=table.columns)
+            styles = styles.mask(table > 0, 'color: #00ff88; font-weight: bold')
+            return styles.mask(table < 0, 'color: #ff4444; font-weight: bold')
+        
+        styled_monthly = monthly_perf.style.apply(color_negative_red, axis=None)
+        st.dataframe(styled_monthly, use_container_width=True, height=200)
+    else:
+        st.info("Add more trades!")
+    
+    st.markdown("---")
+    with instrumentation.stage('chart_build'):
+        equity_chart_section(equity_curve)
+    
+    if not equity_curve.empty:
+        st.markdown("---")
+        projection_section(equity_curve)
 
 else:
     st.warning("⚠️ No trades")
@@ -680,8 +801,31 @@ else:
         if st.button("💾 Save", type="primary"):
             new_df = new_df.dropna(subset=['Stock Name', 'Entry Price', 'Capital'])
             if not new_df.empty:
-                new_df['Entry Date'] = new_df['Entry Date'].apply(parse_date_strict)
-                new_df.to_csv('trades.csv', index=False)
+                new_df['Entry Date'] = parse_date_column(new_df['Entry Date'])
+                trade_store.upsert(new_df.to_dict('records'))
+                get_snapshot_store().rebuild(portfolio)
+                clear_ledger_caches()
                 st.success("✅ Saved!")
                 time.sleep(0.5)
                 st.rerun()
+
+if run_metrics is not None:
+    cache_stats = market_cache.stats()
+    instrumentation.export(run_metrics, cache_stats)
+    with st.expander("🛠️ Debug: performance"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Stage timings**")
+            st.dataframe(pd.DataFrame({'Stage': list(run_metrics.stages), 'Seconds': list(run_metrics.stages.values())}),
+                         use_container_width=True, hide_index=True)
+            st.metric("Peak DataFrame memory", f"{run_metrics.peak_frame_bytes / 1024:,.1f} KB")
+        with col2:
+            st.markdown("**Provider calls and cache**")
+            st.json({'counters': instrumentation.counters(), 'cache': cache_stats})
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Export JSON", json.dumps(instrumentation.to_dict(run_metrics, cache_stats), indent=2),
+                               file_name="metrics.json", mime="application/json")
+        with col2:
+            st.download_button("Export Prometheus", instrumentation.to_prometheus(run_metrics, cache_stats),
+                               file_name="metrics.prom", mime="text/plain")
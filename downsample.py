@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+CHART_POINT_BUDGET = 1500  # about one point per horizontal pixel of a full-width chart
+WEBGL_THRESHOLD = 1000     # longer traces are drawn with Scattergl instead of SVG
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the line's shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Keep the point that forms the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(x, y, budget=CHART_POINT_BUDGET):
+    """Decimate a line to roughly `budget` points with LTTB, always keeping the highest and lowest
+    points and the deepest drawdown (its trough and the peak before it)."""
+    x = pd.Index(x)
+    y = np.asarray(y, dtype=float)
+    if len(y) <= budget:
+        return x, y
+    xs = (x.values.astype('datetime64[ns]').astype(np.int64) / 1e9) if isinstance(x, pd.DatetimeIndex) else x.to_numpy(dtype=float)
+    keep = lttb(xs, y, budget)
+
+    finite = np.where(np.isfinite(y), y, np.nanmin(y) if np.isfinite(y).any() else 0)
+    running_max = np.maximum.accumulate(finite)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = np.where(running_max > 0, finite / running_max, 1.0)
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(finite[:trough + 1]))
+    keep = np.unique(np.concatenate([keep, [int(np.argmax(finite)), int(np.argmin(finite)), trough, peak]]))
+    return x[keep], y[keep]
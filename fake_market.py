@@ -0,0 +1,82 @@
+import zlib
+from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Deterministic offline stand-in for Yahoo, selected with MARKET_DATA_PROVIDER=fake.
+# Every symbol gets its own seeded random walk over business days, so a given
+# (symbol, date) always has the same bar no matter which window is requested.
+EPOCH = '2000-01-03'
+SESSION_OPEN = 9 * 60 + 30  # minutes after midnight, exchange time
+SESSION_MINUTES = 390
+
+
+@lru_cache(maxsize=512)
+def _series(symbol, as_of):
+    dates = pd.bdate_range(EPOCH, as_of, name='Date')
+    rng = np.random.default_rng(zlib.crc32(symbol.upper().encode()))
+    start = rng.uniform(20, 500)
+    close = start * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+    open_ = np.concatenate([[start], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.01, len(dates)))
+    return pd.DataFrame({
+        'Open': open_.round(2),
+        'High': (np.maximum(open_, close) * (1 + spread)).round(2),
+        'Low': (np.minimum(open_, close) * (1 - spread)).round(2),
+        'Close': close.round(2),
+        'Volume': rng.integers(100_000, 10_000_000, len(dates)),
+    }, index=dates)
+
+
+def fake_history(symbol, start=EPOCH, end=None):
+    bars = _series(symbol, datetime.now().strftime('%Y-%m-%d'))
+    return bars.loc[pd.Timestamp(start).normalize():end].copy()
+
+
+def fake_daily_bars(symbols, start, end):
+    bars = {}
+    for symbol in symbols:
+        frame = fake_history(symbol, start, end)
+        if not frame.empty:
+            bars[symbol] = frame
+    return bars
+
+
+def fake_recent_closes(tickers, timeout=None):
+    return {ticker: fake_history(ticker).iloc[-2:]['Close'] for ticker in tickers}
+
+
+@lru_cache(maxsize=4096)
+def _session(symbol, day):
+    # One session of minute closes: a seeded Brownian bridge from the daily bar's open to its close
+    daily = fake_history(symbol, day, day)
+    if daily.empty:
+        return None
+    open_, close = np.log(daily['Open'].iloc[0]), np.log(daily['Close'].iloc[0])
+    rng = np.random.default_rng([zlib.crc32(symbol.upper().encode()), pd.Timestamp(day).toordinal()])
+    walk = np.cumsum(rng.normal(0, 0.0008, SESSION_MINUTES))
+    t = np.arange(1, SESSION_MINUTES + 1) / SESSION_MINUTES
+    closes = np.exp(open_ + t * (close - open_) + walk - t * walk[-1])
+    index = pd.Timestamp(day) + pd.to_timedelta(SESSION_OPEN + np.arange(SESSION_MINUTES), unit='min')
+    return pd.Series(closes.round(2), index=index, name='Close')
+
+
+def fake_intraday_bars(symbols, start, interval='1m'):
+    """Bars from `start` up to now; today's session is cut at the current minute like a live feed."""
+    now = pd.Timestamp(datetime.now())
+    minutes = int(interval.rstrip('m'))
+    bars = {}
+    for symbol in symbols:
+        sessions = [_session(symbol, f"{day:%Y-%m-%d}") for day in pd.bdate_range(pd.Timestamp(start).normalize(), now)]
+        sessions = [s for s in sessions if s is not None]
+        if not sessions:
+            continue
+        closes = pd.concat(sessions)
+        if minutes > 1:
+            closes = closes.resample(f'{minutes}min').last().dropna()
+        closes = closes.loc[pd.Timestamp(start):now]
+        if not closes.empty:
+            bars[symbol] = closes.to_frame()
+    return bars
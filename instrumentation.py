@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get('DASHBOARD_DEBUG') == '1'
+EXPORT_DIR = os.environ.get('METRICS_EXPORT_DIR')  # write metrics.json / metrics.prom after every run
+
+# Disabled instrumentation is one attribute lookup and a shared no-op context manager
+_NULL = nullcontext()
+_local = threading.local()
+_counters = Counter()
+_counters_lock = threading.Lock()
+_counting = ENABLED
+
+
+class RunMetrics:
+    """Stage timings and DataFrame sizes for one script run."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.frames = {}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def track_frame(self, name, df):
+        self.frames[name] = max(self.frames.get(name, 0), int(df.memory_usage(deep=True).sum()))
+
+    @property
+    def peak_frame_bytes(self):
+        return max(self.frames.values(), default=0)
+
+
+def start_run(enabled=None):
+    """Begin collecting for the run on this thread; returns None when instrumentation is off."""
+    global _counting
+    enabled = ENABLED if enabled is None else enabled
+    _local.run = RunMetrics() if enabled else None
+    if enabled:
+        _counting = True
+    return _local.run
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+def stage(name):
+    run = getattr(_local, 'run', None)
+    return _NULL if run is None else run.stage(name)
+
+
+def track_frame(name, df):
+    run = getattr(_local, 'run', None)
+    if run is not None and df is not None:
+        run.track_frame(name, df)
+
+
+def count(name, n=1):
+    # Counters are process-wide: provider calls happen on the quote pool's threads
+    if not _counting:
+        return
+    with _counters_lock:
+        _counters[name] += n
+
+
+def counters():
+    with _counters_lock:
+        return dict(_counters)
+
+
+def to_dict(run, cache_stats=None):
+    return {
+        'started': run.started,
+        'stages_seconds': {k: round(v, 6) for k, v in run.stages.items()},
+        'frames_bytes': dict(run.frames),
+        'peak_frame_bytes': run.peak_frame_bytes,
+        'counters': counters(),
+        'cache': cache_stats or {},
+    }
+
+
+def to_prometheus(run, cache_stats=None):
+    lines = ['# TYPE pnl_stage_seconds gauge']
+    lines += [f'pnl_stage_seconds{{stage="{k}"}} {v:.6f}' for k, v in sorted(run.stages.items())]
+    lines += ['# TYPE pnl_frame_bytes gauge']
+    lines += [f'pnl_frame_bytes{{frame="{k}"}} {v}' for k, v in sorted(run.frames.items())]
+    lines += ['# TYPE pnl_peak_frame_bytes gauge', f'pnl_peak_frame_bytes {run.peak_frame_bytes}']
+    lines += ['# TYPE pnl_events_total counter']
+    lines += [f'pnl_events_total{{event="{k}"}} {v}' for k, v in sorted(counters().items())]
+    lines += ['# TYPE pnl_market_cache gauge']
+    lines += [f'pnl_market_cache{{stat="{k}"}} {v}' for k, v in sorted((cache_stats or {}).items())]
+    return '\n'.join(lines) + '\n'
+
+
+def export(run, cache_stats=None, directory=EXPORT_DIR):
+    if run is None or not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    # Write-then-rename so a scraper never reads half a file
+    for name, text in (('metrics.json', json.dumps(to_dict(run, cache_stats), indent=2)),
+                       ('metrics.prom', to_prometheus(run, cache_stats))):
+        tmp = os.path.join(directory, name + '.tmp')
+        with open(tmp, 'w') as f:
+            f.write(text)
+        os.replace(tmp, os.path.join(directory, name))
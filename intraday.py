@@ -0,0 +1,77 @@
+import threading
+import time
+from datetime import timedelta
+
+import pandas as pd
+
+from fake_market import fake_intraday_bars
+from price_store import MARKET_DATA_PROVIDER, bulk_fetch, exchange_now, yahoo_bars
+
+# Chart period -> (bar interval, calendar days of bars to load); 1D then keeps only the latest session
+INTRADAY_PERIODS = {'1D': ('1m', 4), '1W': ('5m', 7)}
+MIN_REFRESH = 60                 # a new bar at most once a minute, so refetch no more often
+RETENTION = timedelta(days=8)    # bars older than the longest intraday window are dropped
+
+
+class IntradayBars:
+    """Intraday closes kept in memory per (symbol, interval); refreshes only fetch from the last bar on."""
+
+    def __init__(self, fetcher=yahoo_bars, min_refresh=MIN_REFRESH):
+        self.fetcher = fetcher
+        self.min_refresh = min_refresh
+        self._lock = threading.Lock()
+        self._closes = {}
+        self._covered_from = {}
+        self._fetched_at = {}
+
+    def closes(self, symbols, start, interval='1m'):
+        start = pd.Timestamp(start)
+        now = time.time()
+        with self._lock:
+            starts = {}
+            for symbol in sorted({s.upper() for s in symbols}):
+                key = (symbol, interval)
+                stored = self._closes.get(key)
+                if key not in self._covered_from or start < self._covered_from[key]:
+                    starts[symbol] = start
+                elif now - self._fetched_at.get(key, 0) >= self.min_refresh:
+                    # The last stored bar may still have been forming, so it is fetched again
+                    starts[symbol] = stored.index[-1] if stored is not None else start
+
+            for chunk, fetch_from, fetched in bulk_fetch(self.fetcher, starts, 'intraday', interval=interval):
+                for symbol in chunk:
+                    key = (symbol, interval)
+                    self._fetched_at[key] = now
+                    self._covered_from[key] = min(fetch_from, self._covered_from.get(key, fetch_from))
+                    bars = fetched.get(symbol)
+                    if bars is not None and not bars.empty:
+                        self._merge(key, bars['Close'])
+            found = {}
+            for symbol in {s.upper() for s in symbols}:
+                stored = self._closes.get((symbol, interval))
+                if stored is not None and not stored.loc[start:].empty:
+                    found[symbol] = stored.loc[start:]
+            return found
+
+    def _merge(self, key, closes):
+        stored = self._closes.get(key)
+        merged = pd.concat([stored, closes]) if stored is not None else closes
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        cutoff = exchange_now() - RETENTION
+        self._closes[key] = merged.loc[cutoff:].rename(key[0])
+        self._covered_from[key] = max(self._covered_from[key], cutoff)
+
+
+def period_start(period, now=None):
+    days = INTRADAY_PERIODS[period][1]
+    return (pd.Timestamp(now or exchange_now()) - timedelta(days=days)).normalize()
+
+
+def last_session(frame, column='Date'):
+    # 1D shows the latest session with bars, so weekends and pre-market still have a chart
+    days = frame[column].dt.normalize()
+    return frame[days == days.max()]
+
+
+# Module-level so every session appends to the same bars
+intraday_bars = IntradayBars(fetcher=fake_intraday_bars if MARKET_DATA_PROVIDER == 'fake' else yahoo_bars)
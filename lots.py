@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# Shares left below this fraction of a holding count as fully sold (float dust from Sell %)
+CLOSED_EPSILON = 1e-9
+
+
+def build_lots(trades_df, tickers, positions):
+    """One row per buy lot, ordered by ticker and entry date, with FIFO-matched sold shares.
+
+    Sells are recorded on the lots in the ledger, but for a holding the sold shares are
+    matched against the oldest lots first: the n-th lot is consumed by whatever of the
+    ticker's total sold shares is left after the lots before it.
+    """
+    entry_dates = pd.to_datetime(trades_df.loc[positions.index, 'Entry Date'], errors='coerce')
+    sold_shares = positions['initial_shares'] - positions['remaining_shares']
+    lots = pd.DataFrame({
+        'ticker': tickers[positions.index],
+        'entry_date': entry_dates,
+        'entry_price': positions['entry_price'],
+        'shares': positions['initial_shares'],
+        'cost': positions['initial_capital'],
+        'sold_shares': sold_shares,
+        'proceeds': sold_shares * positions['avg_sell_price'],
+        'status': positions['status'],
+    }, index=positions.index)
+    lots = lots.sort_values(['ticker', 'entry_date'], kind='stable', na_position='last')
+
+    grouped = lots.groupby('ticker', sort=False)
+    bought_before = grouped['shares'].cumsum() - lots['shares']
+    ticker_sold = grouped['sold_shares'].transform('sum')
+    lots['fifo_sold'] = (ticker_sold - bought_before).clip(lower=0).clip(upper=lots['shares'])
+    lots['fifo_remaining'] = lots['shares'] - lots['fifo_sold']
+    lots['fifo_cost_sold'] = lots['fifo_sold'] * lots['entry_price']
+    return lots
+
+
+def aggregate_lots(lots, prices):
+    """One position per ticker: weighted-average cost of the shares still held and FIFO realized P&L.
+
+    `prices` maps ticker -> current price (missing/NaN = no quote, valued at cost like calculate_positions).
+    """
+    holdings = lots.groupby('ticker', sort=True).agg(
+        lots=('shares', 'size'),
+        first_entry=('entry_date', 'min'),
+        shares=('shares', 'sum'),
+        cost=('cost', 'sum'),
+        sold_shares=('sold_shares', 'sum'),
+        proceeds=('proceeds', 'sum'),
+        remaining_shares=('fifo_remaining', 'sum'),
+        cost_sold=('fifo_cost_sold', 'sum'),
+    )
+    price = holdings.index.map(lambda t: prices.get(t, np.nan)).to_numpy(dtype=float)
+    has_price = np.isfinite(price) & (price != 0)
+    closed = holdings['remaining_shares'].to_numpy() <= holdings['shares'].to_numpy() * CLOSED_EPSILON
+    remaining_shares = np.where(closed, 0.0, holdings['remaining_shares'])
+    remaining_cost = np.where(closed, 0.0, holdings['cost'] - holdings['cost_sold'])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        realized_pnl = (holdings['proceeds'] - holdings['cost_sold']).to_numpy()
+        current_value = np.where(has_price, remaining_shares * price, remaining_cost)
+        unrealized_pnl = current_value - remaining_cost
+        total_pnl = realized_pnl + unrealized_pnl
+        holdings['avg_cost'] = np.where(remaining_shares > 0, remaining_cost / remaining_shares, np.nan)
+        holdings['realized_pnl_pct'] = np.where(holdings['cost_sold'] > 0, realized_pnl / holdings['cost_sold'] * 100, 0.0)
+        holdings['unrealized_pnl_pct'] = np.where(remaining_cost > 0, unrealized_pnl / remaining_cost * 100, 0.0)
+        holdings['total_pnl_pct'] = np.where(holdings['cost'] > 0, total_pnl / holdings['cost'] * 100, 0.0)
+        sold_pct = holdings['sold_shares'] / holdings['shares'] * 100
+
+    holdings['remaining_shares'] = remaining_shares
+    holdings['remaining_cost'] = remaining_cost
+    holdings['current_price'] = np.where(has_price, price, np.nan)
+    holdings['current_value'] = current_value
+    holdings['realized_pnl'] = realized_pnl
+    holdings['unrealized_pnl'] = unrealized_pnl
+    holdings['total_pnl'] = total_pnl
+    holdings['type'] = np.where(closed, 'CLOSED', np.where(holdings['sold_shares'] > 0, 'PARTIAL', 'OPEN'))
+    status = np.where(closed, '🔒 Closed', '🟢 Open').astype(object)
+    partial = holdings['type'].to_numpy() == 'PARTIAL'
+    if partial.any():
+        status[partial] = [f'🟡 Partial ({pct:.0f}% sold)' for pct in sold_pct[partial]]
+    holdings['status'] = status
+    return holdings
+
+
+def summarize_holdings(holdings):
+    total_invested = holdings['cost'].sum()
+    total_realized = holdings['realized_pnl'].sum()
+    total_unrealized = holdings['unrealized_pnl'].sum()
+    total_pnl = total_realized + total_unrealized
+    return {
+        'total_invested': total_invested,
+        'total_current_value': holdings['current_value'].sum(),
+        'total_realized': total_realized,
+        'total_unrealized': total_unrealized,
+        'total_pnl': total_pnl,
+        'total_pnl_pct': (total_pnl / total_invested * 100) if total_invested > 0 else 0,
+    }
@@ -0,0 +1,139 @@
+from collections import namedtuple
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+
+import pandas as pd
+
+import instrumentation
+from quote_cache import market_cache, MISSING, QUOTE_TTL, INTRADAY_HISTORY_TTL, HISTORY_TTL
+from price_store import price_store, yahoo_bars, exchange_now, MARKET_DATA_PROVIDER
+
+MAX_IN_FLIGHT = 8
+QUOTE_CHUNK_SIZE = 50
+QUOTE_DEADLINE = 8.0                 # seconds the page waits for fresh quotes
+LAST_KNOWN_TTL = 60 * 60 * 24 * 7    # how long a quote can stand in for a missed fetch
+
+Quote = namedtuple('Quote', ['price', 'previous_close', 'stale'])
+
+# Cache misses are fetched as bulk downloads of up to QUOTE_CHUNK_SIZE tickers on a small pool
+# shared by every session, so the page can stop waiting at the deadline. Downloads still take
+# the yf_download_lock in yahoo_bars one at a time; the ones that miss the deadline keep running
+# and fill the cache for the next rerun.
+_executor = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT, thread_name_prefix='quotes')
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def yahoo_recent_closes(tickers, timeout):
+    # A week back always covers the last two sessions
+    start = exchange_now().normalize() - timedelta(days=7)
+    return {t: bars['Close'].iloc[-2:] for t, bars in yahoo_bars(tickers, start, timeout=timeout).items()}
+
+
+def _recent_closes(tickers, timeout):
+    if MARKET_DATA_PROVIDER == 'fake':
+        from fake_market import fake_recent_closes
+        return fake_recent_closes(tickers, timeout)
+    return yahoo_recent_closes(tickers, timeout)
+
+
+def _fetch_quotes(tickers, timeout):
+    instrumentation.count('quote_requests')
+    try:
+        fetched = _recent_closes(tickers, timeout)
+    except:
+        fetched = {}
+    quotes = {}
+    for ticker in tickers:
+        closes = fetched.get(ticker, pd.Series(dtype=float)).dropna()
+        if closes.empty:
+            instrumentation.count('quote_failures')
+            continue
+        current_price = round(closes.iloc[-1], 2)
+        previous_close = round(closes.iloc[-2], 2) if len(closes) >= 2 else current_price
+        quotes[ticker] = Quote(current_price, previous_close, False)
+        market_cache.set(f"quote:{ticker}", quotes[ticker], QUOTE_TTL)
+        market_cache.set(f"last:{ticker}", quotes[ticker], LAST_KNOWN_TTL)
+    return quotes
+
+
+def _submit_fetch(tickers, timeout):
+    # Tickers still being fetched for an earlier rerun join that download instead of starting another
+    futures = set()
+    submitted = []
+    with _in_flight_lock:
+        missing = []
+        for ticker in tickers:
+            if ticker in _in_flight:
+                futures.add(_in_flight[ticker])
+            else:
+                missing.append(ticker)
+        for i in range(0, len(missing), QUOTE_CHUNK_SIZE):
+            chunk = missing[i:i + QUOTE_CHUNK_SIZE]
+            future = _executor.submit(_fetch_quotes, chunk, timeout)
+            _in_flight.update(dict.fromkeys(chunk, future))
+            futures.add(future)
+            submitted.append((chunk, future))
+    # Outside the lock: the callback runs right away if the fetch has already finished
+    for chunk, future in submitted:
+        future.add_done_callback(lambda f, chunk=chunk: _forget(chunk, f))
+    return futures
+
+
+def _forget(tickers, future):
+    with _in_flight_lock:
+        for ticker in tickers:
+            if _in_flight.get(ticker) is future:
+                del _in_flight[ticker]
+
+
+def get_stock_quotes(tickers, deadline=QUOTE_DEADLINE):
+    # Cached quotes first; the misses are fetched in bulk and the page waits at most `deadline`
+    quotes = {}
+    to_fetch = []
+    for ticker in sorted(set(tickers)):
+        cached = market_cache.get(f"quote:{ticker}")
+        if cached is MISSING:
+            to_fetch.append(ticker)
+        else:
+            quotes[ticker] = Quote(*cached[:2], False)
+    instrumentation.count('quote_cache_hits', len(quotes))
+
+    if to_fetch:
+        done, _ = wait(_submit_fetch(to_fetch, deadline), timeout=deadline)
+        for future in done:
+            quotes.update({t: q for t, q in future.result().items() if t in to_fetch})
+
+    # Anything that missed the deadline or failed shows the last known price, marked stale
+    for ticker in to_fetch:
+        if ticker not in quotes:
+            last = market_cache.get(f"last:{ticker}")
+            if last is not MISSING:
+                quotes[ticker] = Quote(*last[:2], True)
+                instrumentation.count('quote_stale_fallbacks')
+    return quotes
+
+
+def get_stock_data(ticker):
+    quote = get_stock_quotes([ticker]).get(ticker)
+    return (quote.price, quote.previous_close) if quote else (None, None)
+
+
+def get_benchmark_history(symbol, start_date):
+    key = f"history:{symbol}:{pd.Timestamp(start_date):%Y-%m-%d}"
+    cached = market_cache.get(key)
+    if cached is not MISSING:
+        instrumentation.count('history_cache_hits')
+        return cached.copy()
+    try:
+        # The price store persists the bars on disk and only fetches the days after its last bar
+        hist = price_store.history(symbol, start_date)
+        if not hist.empty:
+            # Today's bar is still moving; once the last bar is a closed day keep it for long
+            ttl = INTRADAY_HISTORY_TTL if hist.index[-1].date() >= exchange_now().date() else HISTORY_TTL
+            market_cache.set(key, hist, ttl, persist=False)
+        return hist
+    except:
+        instrumentation.count('history_failures')
+        return pd.DataFrame()
@@ -0,0 +1,41 @@
+import argparse
+import time
+from datetime import datetime
+
+from market_data import get_stock_quotes
+from quote_snapshot import publish_snapshot, SNAPSHOT_DB
+from trade_store import TradeStore, DB_PATH
+
+POLL_INTERVAL = 15
+
+
+def poll_once(store, open_only=True, snapshot_path=SNAPSHOT_DB):
+    tickers = store.tickers(open_only=open_only)
+    quotes = get_stock_quotes(tickers)
+    publish_snapshot(quotes, snapshot_path)
+    return tickers, quotes
+
+
+def run(interval=POLL_INTERVAL, db_path=DB_PATH, open_only=True, snapshot_path=SNAPSHOT_DB):
+    # Every portfolio's tickers go into the one shared snapshot
+    store = TradeStore(db_path, portfolio=None)
+    next_run = time.monotonic()
+    while True:
+        try:
+            tickers, quotes = poll_once(store, open_only, snapshot_path)
+            stale = sum(q.stale for q in quotes.values())
+            print(f"[{datetime.now():%H:%M:%S}] published {len(quotes)}/{len(tickers)} quotes ({stale} stale)")
+        except Exception as e:
+            print(f"[{datetime.now():%H:%M:%S}] poll failed: {e}")
+        # Keep a fixed cadence regardless of how long the fetch took, without bursting to catch up
+        next_run = max(next_run + interval, time.monotonic())
+        time.sleep(next_run - time.monotonic())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Poll quotes for the trade store and publish a shared snapshot.")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help='seconds between polls')
+    parser.add_argument('--db', default=DB_PATH, help='trade store to read tickers from')
+    parser.add_argument('--all', action='store_true', help='also poll tickers that only have closed trades')
+    args = parser.parse_args()
+    run(args.interval, args.db, open_only=not args.all)
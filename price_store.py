@@ -0,0 +1,179 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import instrumentation
+from fake_market import fake_daily_bars
+
+STORE_DIR = os.environ.get('PRICE_STORE_DIR', os.path.join('.cache', 'prices'))
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+SYNC_CHUNK_SIZE = 50
+MIN_REFRESH = 300  # seconds between fetches for the same symbol, unless an earlier start is asked for
+MARKET_DATA_PROVIDER = os.environ.get('MARKET_DATA_PROVIDER', 'yahoo')  # 'fake' for offline benchmarks
+
+EXCHANGE_TZ = 'America/New_York'
+
+
+def exchange_now():
+    """Wall-clock time in New York as a naive timestamp, the clock the ledger's dates and bars are on."""
+    return pd.Timestamp.now(tz=EXCHANGE_TZ).tz_localize(None)
+
+
+# yf.download keeps its results in module-level state, so every bulk download in the process
+# (daily and intraday bars, quotes) goes through yahoo_bars and this one lock
+yf_download_lock = threading.Lock()
+
+
+def yahoo_bars(symbols, start, end=None, interval='1d', timeout=10):
+    """Bars for `symbols` from one bulk download, by symbol, on exchange-local naive timestamps."""
+    import yfinance as yf
+    bars = {}
+    try:
+        with yf_download_lock:
+            hist = yf.download(list(symbols), start=start, end=end, interval=interval, group_by='ticker',
+                               auto_adjust=True, prepost=False, progress=False, threads=True, timeout=timeout)
+    except:
+        return bars
+    if hist.empty:
+        return bars
+    for symbol in symbols:
+        try:
+            frame = hist[symbol] if isinstance(hist.columns, pd.MultiIndex) else hist
+        except KeyError:
+            continue
+        frame = frame.dropna(subset=['Close'])
+        if frame.empty:
+            continue
+        # Exchange-local naive timestamps, so days line up with the ledger's dates
+        if frame.index.tz is not None:
+            frame.index = frame.index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+        bars[symbol] = frame
+    return bars
+
+
+def bulk_fetch(fetcher, starts, counter, chunk_size=SYNC_CHUNK_SIZE, **kwargs):
+    """Fetch every symbol from its own start ({symbol: start}) with one request per start and chunk.
+
+    Yields (chunk, start, bars by symbol); requests and symbols missing from the reply are counted
+    as `<counter>_requests` and `<counter>_failures`.
+    """
+    groups = {}
+    for symbol, start in starts.items():
+        groups.setdefault(start, []).append(symbol)
+    for start, group in groups.items():
+        for i in range(0, len(group), chunk_size):
+            chunk = group[i:i + chunk_size]
+            fetched = fetcher(chunk, start, **kwargs)
+            instrumentation.count(f'{counter}_requests')
+            instrumentation.count(f'{counter}_failures', len(set(chunk) - set(fetched)))
+            yield chunk, start, fetched
+
+
+class PriceStore:
+    """Per-symbol daily bars in Parquet files; only bars after the last stored date are fetched."""
+
+    def __init__(self, root=STORE_DIR, fetcher=yahoo_bars, offline=None):
+        self.root = root
+        self.fetcher = fetcher
+        self.offline = offline if offline is not None else os.environ.get('PRICE_STORE_OFFLINE') == '1'
+        self._lock = threading.Lock()
+        self._synced_at = {}  # symbol -> (last refresh, earliest start asked for since)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, symbol):
+        return os.path.join(self.root, f"{symbol.upper()}.parquet")
+
+    def _index_path(self):
+        return os.path.join(self.root, 'index.json')
+
+    def _read_index(self):
+        try:
+            with open(self._index_path()) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index):
+        tmp = self._index_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, self._index_path())
+
+    def read(self, symbol):
+        try:
+            return pd.read_parquet(self.path(symbol))
+        except (OSError, ValueError):
+            return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+    def write(self, symbol, bars):
+        # Write-then-rename so readers never see a half-written file
+        tmp = self.path(symbol) + '.tmp'
+        bars.to_parquet(tmp)
+        os.replace(tmp, self.path(symbol))
+
+    def sync(self, symbols, start):
+        start = pd.Timestamp(start).normalize()
+        if self.offline:
+            return
+        now = time.time()
+        with self._lock:
+            index = self._read_index()
+            gaps, deltas = {}, {}
+            for symbol in sorted({s.upper() for s in symbols}):
+                covered_from = index.get(symbol, {}).get('covered_from')
+                stored = self.read(symbol)
+                synced_at, asked_from = self._synced_at.get(symbol, (0, None))
+                recent = now - synced_at < MIN_REFRESH
+                if covered_from is None or stored.empty:
+                    index.pop(symbol, None)
+                    if recent and start >= asked_from:
+                        continue
+                    deltas[symbol] = start
+                else:
+                    # Only the days before the stored range are fetched for an earlier start
+                    if start < pd.Timestamp(covered_from) and not (recent and start >= asked_from):
+                        gaps.setdefault(pd.Timestamp(covered_from), {})[symbol] = start
+                    elif recent:
+                        continue
+                    if not recent:
+                        # Re-read the last stored bar too, it may have been an intraday snapshot
+                        deltas[symbol] = stored.index[-1]
+                self._synced_at[symbol] = (now if symbol in deltas else synced_at, start)
+
+            requests = list(gaps.items()) + [(datetime.now() + timedelta(days=1), deltas)]
+            for end, starts in requests:
+                for chunk, fetch_from, fetched in bulk_fetch(self.fetcher, starts, 'history', end=end):
+                    for symbol in chunk:
+                        bars = fetched.get(symbol)
+                        if bars is None or bars.empty:
+                            continue
+                        self._merge(symbol, bars)
+                        covered_from = index.get(symbol, {}).get('covered_from')
+                        if covered_from is None or fetch_from < pd.Timestamp(covered_from):
+                            index[symbol] = {'covered_from': f"{fetch_from:%Y-%m-%d}"}
+            if gaps or deltas:
+                self._write_index(index)
+
+    def _merge(self, symbol, bars):
+        bars = bars[[c for c in BAR_COLUMNS if c in bars.columns]].copy()
+        if bars.index.tz is not None:
+            bars.index = bars.index.tz_localize(None)
+        bars.index = bars.index.normalize()
+        bars.index.name = 'Date'
+        stored = self.read(symbol)
+        merged = pd.concat([stored, bars]) if not stored.empty else bars
+        merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+        self.write(symbol, merged)
+
+    def history(self, symbol, start, end=None):
+        self.sync([symbol], start)
+        bars = self.read(symbol)
+        return bars.loc[pd.Timestamp(start).normalize():end] if not bars.empty else bars
+
+
+# Module-level so Streamlit reruns share the throttle state
+price_store = PriceStore(fetcher=fake_daily_bars if MARKET_DATA_PROVIDER == 'fake' else yahoo_bars)
@@ -0,0 +1,132 @@
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+import pandas as pd
+
+PROJECTION_WORKERS = int(os.environ.get('PROJECTION_WORKERS', 0)) or os.cpu_count() or 1
+BATCH_PATHS = 5_000               # paths generated per task
+# Simulations up to this many cells (paths x days) run inline: about 0.5s, less than a cold
+# worker takes to start. The dashboard's 10,000-path options all stay below it.
+INLINE_CELLS = 6_000_000
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+DRAWDOWN_LEVELS = (0.1, 0.2, 0.3)
+
+Projection = namedtuple('Projection', ['bands', 'final', 'loss_probability', 'drawdown_probability',
+                                       'median_drawdown', 'paths', 'horizon', 'seed'])
+
+# Tasks only need this module, but a spawned worker first re-imports the parent's __main__ as
+# __mp_main__ (under `streamlit run`, the Streamlit CLI), so each worker takes most of a second to
+# start. The pool is created on first use and then shared by every session for the life of the
+# process, so that cost is paid once per worker.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PROJECTION_WORKERS, mp_context=get_context('spawn'))
+        return _pool
+
+
+def daily_returns(equity_curve):
+    """Business-day returns of an equity curve, the sample the paths are drawn from."""
+    if equity_curve.empty:
+        return np.array([])
+    equity = equity_curve.set_index('Date')['Equity']
+    equity = equity[equity.index.dayofweek < 5].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = equity[1:] / equity[:-1] - 1
+    return returns[np.isfinite(returns)]
+
+
+def _fill_paths(growth, returns, seed, start, stop):
+    # Growth of 1 along each path; rows are days so each day's values are contiguous for the quantiles
+    rng = np.random.default_rng(seed)
+    block = np.cumprod(1 + returns[rng.integers(0, len(returns), (stop - start, growth.shape[0]))], axis=1)
+    growth[:, start:stop] = block.T
+    peak = np.maximum(np.maximum.accumulate(block, axis=1), 1.0)
+    return np.minimum((block / peak - 1).min(axis=1), 0.0)
+
+
+def _paths_task(name, shape, returns, seed, start, stop):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return start, _fill_paths(np.ndarray(shape, dtype=np.float64, buffer=shm.buf), returns, seed, start, stop)
+    finally:
+        shm.close()
+
+
+def _quantiles_task(name, shape, first, last):
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        growth = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        return first, np.quantile(growth[first:last], QUANTILES, axis=1).T
+    finally:
+        shm.close()
+
+
+def simulate(returns, paths=10_000, horizon=252, seed=None, workers=None):
+    """Bootstrap `paths` futures of `horizon` days from historical daily returns.
+
+    Paths are generated in batches of BATCH_PATHS, each with its own child of the seed, so a seed
+    gives the same result however many workers run. Bands are growth multiples of today's value.
+    """
+    returns = np.asarray(returns, dtype=float)
+    if len(returns) == 0 or paths <= 0 or horizon <= 0:
+        return None
+    workers = workers or PROJECTION_WORKERS
+    bounds = list(range(0, paths, BATCH_PATHS)) + [paths]
+    seeds = np.random.SeedSequence(seed).spawn(len(bounds) - 1)
+    shape = (horizon, paths)
+    drawdowns = np.empty(paths)
+
+    if workers <= 1 or paths * horizon <= INLINE_CELLS:
+        growth = np.empty(shape)
+        for start, stop, child in zip(bounds[:-1], bounds[1:], seeds):
+            drawdowns[start:stop] = _fill_paths(growth, returns, child, start, stop)
+        bands = np.quantile(growth, QUANTILES, axis=1).T
+        final = growth[-1]
+    else:
+        # Workers write straight into shared memory, so only seeds and summaries cross processes
+        pool = _get_pool()
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+        try:
+            growth = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            jobs = [pool.submit(_paths_task, shm.name, shape, returns, child, start, stop)
+                    for start, stop, child in zip(bounds[:-1], bounds[1:], seeds)]
+            for job in jobs:
+                start, batch = job.result()
+                drawdowns[start:start + len(batch)] = batch
+            step = -(-horizon // workers)
+            bands = np.empty((horizon, len(QUANTILES)))
+            jobs = [pool.submit(_quantiles_task, shm.name, shape, first, min(first + step, horizon))
+                    for first in range(0, horizon, step)]
+            for job in jobs:
+                first, rows = job.result()
+                bands[first:first + len(rows)] = rows
+            final = growth[-1].copy()
+        finally:
+            # The buffer can't be closed while an array still points into it
+            growth = None
+            shm.close()
+            shm.unlink()
+
+    columns = [f"p{int(q * 100)}" for q in QUANTILES]
+    bands = pd.DataFrame(np.vstack([np.ones(len(QUANTILES)), bands]), columns=columns)
+    bands.index.name = 'Day'
+    return Projection(
+        bands=bands,
+        final=dict(zip(columns, bands.iloc[-1])),
+        loss_probability=float((final < 1).mean()),
+        drawdown_probability={level: float((drawdowns <= -level).mean()) for level in DRAWDOWN_LEVELS},
+        median_drawdown=float(np.median(drawdowns)),
+        paths=paths,
+        horizon=horizon,
+        seed=seed,
+    )
@@ -0,0 +1,119 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+CACHE_DIR = os.environ.get('MARKET_CACHE_DIR', '.cache')
+QUOTE_TTL = 15                  # intraday quotes go stale quickly
+INTRADAY_HISTORY_TTL = 60 * 5   # history whose last bar is today's session
+HISTORY_TTL = 60 * 60 * 12      # closed daily bars don't change
+
+MISSING = object()
+
+
+class TTLCache:
+    """In-process LRU with per-key TTL, backed by an optional SQLite tier that survives restarts."""
+
+    def __init__(self, maxsize=2048, db_path=None):
+        self.maxsize = maxsize
+        self.db_path = db_path
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.db_path:
+            self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        # sqlite3's own context manager only commits; the connection is closed here too
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            with self._connect() as conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)')
+                conn.execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+        except sqlite3.Error:
+            self.db_path = None
+
+    def get(self, key, default=MISSING):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    row = conn.execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+                if row and row[1] > now:
+                    value = pickle.loads(row[0])
+                    self._remember(key, value, row[1])
+                    with self._lock:
+                        self.hits += 1
+                        self.disk_hits += 1
+                    return value
+            except (sqlite3.Error, pickle.UnpicklingError):
+                pass
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value, ttl, persist=True):
+        expires_at = time.time() + ttl
+        self._remember(key, value, expires_at)
+        if self.db_path and persist:
+            try:
+                with self._connect() as conn:
+                    conn.execute('INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                                 (key, pickle.dumps(value), expires_at))
+            except sqlite3.Error:
+                pass
+
+    def _remember(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+        if self.db_path:
+            try:
+                with self._connect() as conn:
+                    conn.execute('DELETE FROM cache')
+            except sqlite3.Error:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._data), 'maxsize': self.maxsize
+            }
+
+
+# Module-level so it outlives Streamlit reruns (the script is re-executed, imports are not)
+market_cache = TTLCache(db_path=os.path.join(CACHE_DIR, 'market_data.db'))
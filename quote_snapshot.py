@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from market_data import Quote
+from quote_cache import CACHE_DIR
+
+SNAPSHOT_DB = os.path.join(CACHE_DIR, 'quote_snapshot.db')
+MAX_SNAPSHOT_AGE = 60  # seconds before the dashboard stops trusting the poller's snapshot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    ticker TEXT PRIMARY KEY,
+    price REAL NOT NULL,
+    previous_close REAL,
+    stale INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS snapshot (id INTEGER PRIMARY KEY CHECK (id = 1), published_at REAL NOT NULL);
+"""
+
+
+@contextmanager
+def _connect(path, setup=False):
+    if setup:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        if setup:
+            # Only the writer sets up the file; WAL mode persists in it, and lets the dashboard
+            # read the previous snapshot while the poller writes the next one
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def publish_snapshot(quotes, path=SNAPSHOT_DB):
+    """Replace the whole snapshot in one transaction so readers never see a mix of two polls."""
+    with _connect(path, setup=True) as conn:
+        conn.execute('DELETE FROM quotes')
+        conn.executemany('INSERT INTO quotes (ticker, price, previous_close, stale) VALUES (?, ?, ?, ?)',
+                         [(t, float(q.price), float(q.previous_close), int(q.stale)) for t, q in quotes.items()])
+        conn.execute('INSERT OR REPLACE INTO snapshot (id, published_at) VALUES (1, ?)', (time.time(),))
+
+
+def read_snapshot(max_age=MAX_SNAPSHOT_AGE, path=SNAPSHOT_DB):
+    """Return (quotes, published_at), or ({}, None) when there is no snapshot fresher than max_age."""
+    if not os.path.exists(path):
+        return {}, None
+    try:
+        with _connect(path) as conn:
+            conn.execute('BEGIN')
+            row = conn.execute('SELECT published_at FROM snapshot WHERE id = 1').fetchone()
+            if row is None or time.time() - row[0] > max_age:
+                return {}, None
+            rows = conn.execute('SELECT ticker, price, previous_close, stale FROM quotes').fetchall()
+    except sqlite3.Error:
+        return {}, None
+    return {t: Quote(price, prev, bool(stale)) for t, price, prev, stale in rows}, row[0]
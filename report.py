@@ -0,0 +1,184 @@
+import argparse
+import json
+import math
+import os
+import sys
+from datetime import datetime
+from html import escape
+
+import pandas as pd
+
+from analytics import (calculate_positions, summarize_positions, calculate_equity_curve, calculate_monthly_performance,
+                       calculate_cagr)
+from lots import build_lots, aggregate_lots, summarize_holdings
+from risk import RiskEngine
+from trade_store import TradeStore, DATE_COLUMNS, DEFAULT_PORTFOLIO, normalize_frame
+
+# Batch reports for one or many ledgers, without Streamlit or Plotly. Market data modules are
+# only imported for the price source that is asked for, so `--prices none` never touches them.
+FORMATS = ('json', 'csv', 'html')
+PRICE_SOURCES = ('store', 'live', 'none')
+POSITION_COLUMNS = ['lots', 'first_entry', 'shares', 'remaining_shares', 'avg_cost', 'current_price', 'cost',
+                    'remaining_cost', 'current_value', 'realized_pnl', 'realized_pnl_pct', 'unrealized_pnl',
+                    'unrealized_pnl_pct', 'total_pnl', 'total_pnl_pct', 'type']
+
+
+def load_ledger(path, portfolio=DEFAULT_PORTFOLIO):
+    """Trades from a trades.db (one portfolio) or a trades.csv, shaped like TradeStore.load_frame."""
+    if path.lower().endswith('.csv'):
+        df = normalize_frame(pd.read_csv(path).dropna(how='all'))
+        df = df[df['Stock Name'].notna()].reset_index(drop=True)
+        for col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d')
+        df.insert(0, 'id', range(1, len(df) + 1))
+        return df
+    if not os.path.exists(path):
+        raise FileNotFoundError("no such ledger")
+    return TradeStore(path, csv_path=None, portfolio=portfolio).load_frame()
+
+
+def ledger_names(paths):
+    """A distinct report name per ledger: the file name, qualified by its directory when that is shared."""
+    names = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    names = [f"{os.path.basename(os.path.dirname(os.path.abspath(p)))}-{n}" if names.count(n) > 1 else n
+             for p, n in zip(paths, names)]
+    # Still equal (same directory name, or the same ledger twice): number the repeats
+    return [n if names[:i].count(n) == 0 else f"{n}-{names[:i].count(n) + 1}" for i, n in enumerate(names)]
+
+
+def ledger_targets(paths, portfolio=DEFAULT_PORTFOLIO, all_portfolios=False):
+    """(name, path, portfolio) for every report to build."""
+    targets = []
+    for path, name in zip(paths, ledger_names(paths)):
+        if path.lower().endswith('.csv'):
+            targets.append((name, path, None))
+        elif all_portfolios and os.path.exists(path):
+            targets += [(f"{name}-{p}", path, p) for p in TradeStore(path, csv_path=None).portfolios()]
+        else:
+            targets.append((name if portfolio == DEFAULT_PORTFOLIO else f"{name}-{portfolio}", path, portfolio))
+    return targets
+
+
+def current_prices(tickers, source):
+    if source == 'none' or not tickers:
+        return {}
+    if source == 'live':
+        from market_data import get_stock_quotes
+        return {t: q.price for t, q in get_stock_quotes(tickers).items()}
+    from price_store import price_store
+    prices = {}
+    for ticker in tickers:
+        bars = price_store.read(ticker)
+        if not bars.empty:
+            prices[ticker] = float(bars['Close'].iloc[-1])
+    return prices
+
+
+def build_report(trades_df, prices):
+    """Positions per ticker, headline metrics and the monthly returns table for one ledger."""
+    tickers = trades_df['Stock Name'].astype(str).str.strip().str.upper()
+    held = trades_df[~tickers.isin(['', 'NAN', '0'])]
+    held_tickers = tickers[held.index]
+    positions = calculate_positions(held, held_tickers.map(prices).astype(float))
+    holdings = aggregate_lots(build_lots(held, held_tickers, positions), prices)
+    totals = {**summarize_positions(positions), **summarize_holdings(holdings)}
+
+    equity_curve = calculate_equity_curve(trades_df)
+    risk = RiskEngine().extend(equity_curve).metrics() if not equity_curve.empty else {}
+    first_entry = trades_df['Entry Date'].min()
+    years = max((datetime.now() - pd.to_datetime(first_entry)).days / 365, 0.01) if pd.notna(first_entry) else 0
+    metrics = {
+        **totals,
+        'trades': len(positions),
+        'win_rate': totals['winning_trades'] / totals['closed_trades'] * 100 if totals['closed_trades'] else 0,
+        'cagr': calculate_cagr(totals['total_invested'], totals['total_invested'] + totals['total_pnl'], years)
+                if len(equity_curve) > 1 else 0,
+        **{k: v for k, v in risk.items() if k != 'benchmarks'},
+        'priced_tickers': sum(t in prices for t in holdings.index),
+    }
+    monthly = calculate_monthly_performance(trades_df, equity_curve) if not equity_curve.empty else pd.DataFrame()
+    return {'metrics': metrics, 'positions': holdings[POSITION_COLUMNS].rename_axis('ticker'), 'monthly': monthly}
+
+
+def _plain(value):
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def to_json(reports):
+    return json.dumps({
+        name: {
+            'metrics': {k: _plain(v) for k, v in report['metrics'].items()},
+            'positions': json.loads(report['positions'].reset_index().to_json(orient='records', date_format='iso')),
+            'monthly': json.loads(report['monthly'].to_json(orient='index')) if not report['monthly'].empty else {},
+        } for name, report in reports.items()
+    }, indent=2)
+
+
+def to_csv(report):
+    metrics = pd.Series(report['metrics'], name='value').rename_axis('metric')
+    return {'metrics': metrics.to_csv(), 'positions': report['positions'].to_csv(),
+            'monthly': report['monthly'].to_csv()}
+
+
+def to_html(reports):
+    parts = ['<!DOCTYPE html><html><head><meta charset="utf-8"><title>P&amp;L report</title>',
+             '<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1.5em}'
+             'td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}</style></head><body>',
+             f'<p>Generated {datetime.now():%Y-%m-%d %H:%M}</p>']
+    for name, report in reports.items():
+        metrics = pd.Series(report['metrics'], name='value').rename_axis('metric').to_frame()
+        parts += [f'<h1>{escape(name)}</h1>', '<h2>Metrics</h2>', metrics.to_html(float_format='{:,.2f}'.format),
+                  '<h2>Positions</h2>', report['positions'].to_html(float_format='{:,.2f}'.format, na_rep=''),
+                  '<h2>Monthly Performance (%)</h2>', report['monthly'].to_html(float_format='{:.2f}'.format)]
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def write_reports(reports, fmt, out=None):
+    if fmt == 'csv':
+        for name, report in reports.items():
+            for table, text in to_csv(report).items():
+                if out:
+                    with open(os.path.join(out, f"{name}-{table}.csv"), 'w') as f:
+                        f.write(text)
+                else:
+                    sys.stdout.write(f"# {name} {table}\n{text}\n")
+        return
+    text = to_json(reports) if fmt == 'json' else to_html(reports)
+    if out:
+        with open(os.path.join(out, f"report.{fmt}"), 'w') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Positions, metrics and monthly returns for trade ledgers.')
+    parser.add_argument('ledgers', nargs='+', help='trades.db or trades.csv files')
+    parser.add_argument('--format', choices=FORMATS, default='json')
+    parser.add_argument('--out', help='directory to write into (default stdout)')
+    parser.add_argument('--portfolio', default=DEFAULT_PORTFOLIO, help='portfolio to report from .db ledgers')
+    parser.add_argument('--all-portfolios', action='store_true', help='one report per portfolio of each .db ledger')
+    parser.add_argument('--prices', choices=PRICE_SOURCES, default='store',
+                        help='store: last local daily close (no network), live: fetch quotes, none: value at cost')
+    args = parser.parse_args(argv)
+
+    reports = {}
+    for name, path, portfolio in ledger_targets(args.ledgers, args.portfolio, args.all_portfolios):
+        try:
+            trades_df = load_ledger(path, portfolio)
+        except (OSError, ValueError) as e:
+            parser.exit(1, f"{path}: {e}\n")
+        tickers = sorted(trades_df['Stock Name'].dropna().astype(str).str.strip().str.upper().unique())
+        reports[name] = build_report(trades_df, current_prices(tickers, args.prices))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    write_reports(reports, args.format, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,235 @@
+import copy
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+ROLLING_WINDOW = 63        # about three months of daily returns
+RISK_FREE_RATE = 0.02
+
+
+class _Comoments:
+    """Running means, squared deviations and co-moment of paired (portfolio, benchmark) returns."""
+
+    def __init__(self):
+        self.last_close = np.nan
+        self.n = 0
+        self.mean_p = self.mean_b = 0.0
+        self.m2_p = self.m2_b = self.c = 0.0
+
+    def add(self, p, b):
+        self.n += 1
+        dp = p - self.mean_p
+        self.mean_p += dp / self.n
+        db = b - self.mean_b
+        self.mean_b += db / self.n
+        self.m2_p += dp * (p - self.mean_p)
+        self.m2_b += db * (b - self.mean_b)
+        self.c += dp * (b - self.mean_b)
+
+    def fill(self, p, b):
+        self.n = len(p)
+        if self.n:
+            self.mean_p, self.mean_b = p.mean(), b.mean()
+            self.m2_p = ((p - self.mean_p) ** 2).sum()
+            self.m2_b = ((b - self.mean_b) ** 2).sum()
+            self.c = ((p - self.mean_p) * (b - self.mean_b)).sum()
+
+    def stats(self, rf):
+        if self.n < 2 or self.m2_b <= 0:
+            return {'beta': np.nan, 'alpha': np.nan, 'correlation': np.nan}
+        beta = self.c / self.m2_b
+        correlation = self.c / np.sqrt(self.m2_p * self.m2_b) if self.m2_p > 0 else np.nan
+        # Jensen's alpha, annualized, in percent
+        alpha = ((self.mean_p - rf) - beta * (self.mean_b - rf)) * TRADING_DAYS * 100
+        return {'beta': beta, 'alpha': alpha, 'correlation': correlation}
+
+
+class RiskEngine:
+    """Risk metrics of an equity curve kept as running state, so appending a day is O(1).
+
+    Returns are day-over-day changes of the curve; non-finite ones (from zero equity) are skipped.
+    Over the same series, Sharpe and max drawdown equal calculate_sharpe_ratio and calculate_max_drawdown.
+    """
+
+    def __init__(self, benchmarks=(), window=ROLLING_WINDOW, risk_free_rate=RISK_FREE_RATE):
+        self.window = window
+        self.rf = risk_free_rate / TRADING_DAYS
+        self.lock = threading.Lock()
+        self.last_date = None
+        self.last_equity = np.nan
+        # Welford mean / sum of squared deviations, over all returns and over the last `window`
+        self.n, self.mean, self.m2 = 0, 0.0, 0.0
+        self.recent, self.recent_mean, self.recent_m2 = deque(), 0.0, 0.0
+        self.peak, self.peak_date, self.underwater = 0.0, None, False
+        self.max_drawdown, self.max_drawdown_days = 0.0, 0
+        self.current_drawdown = 0.0
+        self.benchmarks = {name: _Comoments() for name in benchmarks}
+        self.history = []  # (date, rolling Sharpe, rolling volatility %) per day
+
+    def extend(self, equity_curve, benchmark_closes=None):
+        """Fold in the curve's days after the last one seen; the first call backfills vectorized."""
+        benchmark_closes = benchmark_closes or {}
+        with self.lock:
+            if self.last_date is None:
+                self._backfill(equity_curve, benchmark_closes)
+                return self
+            new = equity_curve[equity_curve['Date'] > self.last_date]
+            for date, equity in zip(new['Date'], new['Equity']):
+                closes = {name: s.asof(date) if not s.empty else np.nan for name, s in benchmark_closes.items()}
+                self.update(date, equity, closes)
+        return self
+
+    def update(self, date, equity, closes=None):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = np.divide(equity, self.last_equity) - 1 if self.last_date is not None else np.nan
+        self.last_date, self.last_equity = date, equity
+        if np.isfinite(r):
+            self._add_return(r)
+        self._add_drawdown(date, equity)
+        for name, state in self.benchmarks.items():
+            close = (closes or {}).get(name, np.nan)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                b = np.divide(close, state.last_close) - 1
+            if np.isfinite(close):
+                state.last_close = close
+            if np.isfinite(r) and np.isfinite(b):
+                state.add(r, b)
+        self.history.append((date, self.rolling_sharpe, self.rolling_volatility))
+
+    def with_day(self, date, equity, closes=None):
+        """A copy with one more day applied, e.g. today's still-moving point; this engine is unchanged."""
+        with self.lock:
+            live = copy.copy(self)
+            live.recent = deque(self.recent)
+            live.benchmarks = {name: copy.copy(state) for name, state in self.benchmarks.items()}
+        live.history = []
+        live.update(date, equity, closes)
+        return live
+
+    def _add_return(self, r):
+        self.n += 1
+        delta = r - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (r - self.mean)
+        self.recent.append(r)
+        if len(self.recent) <= self.window:
+            delta = r - self.recent_mean
+            self.recent_mean += delta / len(self.recent)
+            self.recent_m2 += delta * (r - self.recent_mean)
+        else:
+            # Sliding update: the oldest return leaves as the new one enters
+            old = self.recent.popleft()
+            previous_mean = self.recent_mean
+            self.recent_mean += (r - old) / self.window
+            self.recent_m2 = max(self.recent_m2 + (r - old) * (r - self.recent_mean + old - previous_mean), 0.0)
+
+    def _add_drawdown(self, date, equity):
+        if equity >= self.peak:
+            if self.underwater:
+                self.max_drawdown_days = max(self.max_drawdown_days, (date - self.peak_date).days)
+            self.peak, self.peak_date, self.underwater = equity, date, False
+            self.current_drawdown = 0.0
+        elif self.peak > 0:
+            self.underwater = True
+            self.current_drawdown = (equity - self.peak) / self.peak * 100
+            self.max_drawdown = min(self.max_drawdown, self.current_drawdown)
+            self.max_drawdown_days = max(self.max_drawdown_days, (date - self.peak_date).days)
+
+    def _backfill(self, equity_curve, benchmark_closes):
+        if equity_curve.empty:
+            return
+        dates = pd.DatetimeIndex(equity_curve['Date'])
+        equity = equity_curve['Equity'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = np.concatenate([[np.nan], equity[1:] / equity[:-1] - 1])
+        ok = np.isfinite(returns)
+        r = returns[ok]
+        self.last_date, self.last_equity = dates[-1], equity[-1]
+
+        self.n = len(r)
+        if self.n:
+            self.mean = r.mean()
+            self.m2 = ((r - self.mean) ** 2).sum()
+            recent = r[-self.window:]
+            self.recent = deque(recent)
+            self.recent_mean = recent.mean()
+            self.recent_m2 = ((recent - self.recent_mean) ** 2).sum()
+
+        # Drawdown runs: a point at or above the previous peak starts a new one
+        cummax = np.maximum.accumulate(equity)
+        previous_peak = np.concatenate([[-np.inf], cummax[:-1]])
+        new_high = equity >= previous_peak
+        peak_idx = np.maximum.accumulate(np.where(new_high, np.arange(len(equity)), 0))
+        underwater = ~new_high & (previous_peak > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = np.where(underwater, (equity - previous_peak) / previous_peak * 100, 0.0)
+        recovered = new_high & np.concatenate([[False], underwater[:-1]])
+        since_peak = (dates - dates[np.concatenate([[0], peak_idx[:-1]])]).days.to_numpy()
+        self.max_drawdown = min(drawdown.min(), 0.0)
+        self.max_drawdown_days = int(since_peak[underwater | recovered].max(initial=0))
+        self.peak, self.peak_date = cummax[-1], dates[peak_idx[-1]]
+        self.underwater, self.current_drawdown = bool(underwater[-1]), drawdown[-1]
+
+        for name, state in self.benchmarks.items():
+            closes = benchmark_closes.get(name)
+            if closes is None or closes.empty:
+                continue
+            closes = closes[~closes.index.duplicated(keep='last')].sort_index()
+            aligned = closes.reindex(dates, method='ffill').to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                b = np.concatenate([[np.nan], aligned[1:] / aligned[:-1] - 1])
+            paired = ok & np.isfinite(b)
+            state.fill(returns[paired], b[paired])
+            finite = aligned[np.isfinite(aligned)]
+            state.last_close = finite[-1] if len(finite) else np.nan
+
+        rolling = pd.Series(r, index=dates[ok]).rolling(self.window, min_periods=2)
+        mean, std = rolling.mean(), rolling.std()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = ((mean - self.rf) / std * np.sqrt(TRADING_DAYS)).where(std > 0)
+        volatility = std * np.sqrt(TRADING_DAYS) * 100
+        frame = pd.DataFrame({'sharpe': sharpe, 'volatility': volatility}).reindex(dates).ffill()
+        self.history = list(zip(dates, frame['sharpe'], frame['volatility']))
+
+    @property
+    def sharpe(self):
+        std = np.sqrt(self.m2 / (self.n - 1)) if self.n >= 2 else 0
+        return (self.mean - self.rf) / std * np.sqrt(TRADING_DAYS) if std > 0 else 0
+
+    @property
+    def volatility(self):
+        return np.sqrt(self.m2 / (self.n - 1) * TRADING_DAYS) * 100 if self.n >= 2 else 0
+
+    @property
+    def rolling_sharpe(self):
+        k = len(self.recent)
+        std = np.sqrt(self.recent_m2 / (k - 1)) if k >= 2 else 0
+        return (self.recent_mean - self.rf) / std * np.sqrt(TRADING_DAYS) if std > 0 else np.nan
+
+    @property
+    def rolling_volatility(self):
+        k = len(self.recent)
+        return np.sqrt(self.recent_m2 / (k - 1) * TRADING_DAYS) * 100 if k >= 2 else np.nan
+
+    @property
+    def current_drawdown_days(self):
+        return (self.last_date - self.peak_date).days if self.underwater else 0
+
+    def rolling_frame(self):
+        return pd.DataFrame(self.history, columns=['Date', 'Rolling Sharpe', 'Rolling Volatility'])
+
+    def metrics(self):
+        return {
+            'sharpe': self.sharpe,
+            'volatility': self.volatility,
+            'rolling_sharpe': self.rolling_sharpe,
+            'rolling_volatility': self.rolling_volatility,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_days': self.max_drawdown_days,
+            'current_drawdown': self.current_drawdown,
+            'current_drawdown_days': self.current_drawdown_days,
+            'benchmarks': {name: state.stats(self.rf) for name, state in self.benchmarks.items()},
+        }
@@ -0,0 +1,224 @@
+import argparse
+import sqlite3
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from analytics import calculate_daily_snapshots
+from price_store import price_store, exchange_now
+from trade_store import TradeStore, DB_PATH, DEFAULT_PORTFOLIO
+
+# End-of-day snapshots live next to the ledger in trades.db. Days are only ever appended, except
+# that a ledger edit marks the earliest date it touched (meta 'changed_from:<portfolio>'): rows
+# from that date on are ignored by readers until rebuild() replaces them. snapshot_months keeps
+# the equity of every month end already materialized, so only the open month is resampled.
+SNAPSHOT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS snapshot_days (
+    portfolio TEXT NOT NULL,
+    date TEXT NOT NULL,
+    equity REAL,
+    invested REAL,
+    realized_pnl REAL,
+    market_value REAL,
+    PRIMARY KEY (portfolio, date)
+);
+CREATE TABLE IF NOT EXISTS snapshot_positions (
+    portfolio TEXT NOT NULL,
+    date TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    shares REAL,
+    cost REAL,
+    close REAL,
+    value REAL,
+    PRIMARY KEY (portfolio, date, ticker)
+);
+CREATE TABLE IF NOT EXISTS snapshot_benchmarks (
+    portfolio TEXT NOT NULL,
+    date TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    close REAL,
+    PRIMARY KEY (portfolio, date, symbol)
+);
+CREATE TABLE IF NOT EXISTS snapshot_months (
+    portfolio TEXT NOT NULL,
+    date TEXT NOT NULL,
+    equity REAL,
+    PRIMARY KEY (portfolio, date)
+);
+"""
+BENCHMARK_SYMBOLS = ('SPY', 'QQQ')
+SESSION_CLOSE_HOUR = 16
+
+Snapshots = namedtuple('Snapshots', ['equity', 'benchmarks', 'live_from', 'month_ends'])
+
+
+def last_closed_day(now=None):
+    """The latest day whose session has closed in New York."""
+    now = pd.Timestamp(now) if now is not None else exchange_now()
+    day = now.normalize()
+    return day if now.hour >= SESSION_CLOSE_HOUR else day - timedelta(days=1)
+
+
+class SnapshotStore:
+    """Materialized end-of-day equity, positions and benchmark closes per portfolio."""
+
+    def __init__(self, path=DB_PATH, prices=price_store, benchmarks=BENCHMARK_SYMBOLS):
+        self.path = path
+        self.prices = prices
+        self.benchmarks = benchmarks
+        with self._connect() as conn:
+            conn.executescript(SNAPSHOT_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _meta(self, conn, key):
+        row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _valid_until(self, conn, portfolio, before=None):
+        # Rows on or after the earliest edited date, or `before`, don't count
+        bounds = [d for d in (self._meta(conn, f"changed_from:{portfolio}"),
+                              before and f"{pd.Timestamp(before):%Y-%m-%d}") if d]
+        return min(bounds) if bounds else '9999-12-31'
+
+    def version(self, portfolio):
+        """Moves whenever the portfolio's snapshots are written."""
+        with self._connect() as conn:
+            return int(self._meta(conn, f"snapshots:{portfolio}") or 0)
+
+    def read(self, portfolio, before=None):
+        """Valid snapshot days before `before`: equity curve, benchmark closes by symbol, first day to compute live
+        and the equity at each closed month end."""
+        with self._connect() as conn:
+            until = self._valid_until(conn, portfolio, before)
+            equity = pd.read_sql_query(
+                'SELECT date AS "Date", equity AS "Equity" FROM snapshot_days '
+                'WHERE portfolio = ? AND date < ? ORDER BY date', conn, params=(portfolio, until))
+            benchmarks = pd.read_sql_query(
+                'SELECT symbol, date, close FROM snapshot_benchmarks WHERE portfolio = ? AND date < ? ORDER BY date',
+                conn, params=(portfolio, until))
+            months = pd.read_sql_query(
+                'SELECT date AS "Date", equity AS "Equity" FROM snapshot_months '
+                'WHERE portfolio = ? AND date < ? ORDER BY date', conn, params=(portfolio, until))
+        equity['Date'] = pd.to_datetime(equity['Date'], format='%Y-%m-%d')
+        benchmarks['date'] = pd.to_datetime(benchmarks['date'], format='%Y-%m-%d')
+        closes = {symbol: group.set_index('date')['close'].rename_axis('Date').rename('Close')
+                  for symbol, group in benchmarks.groupby('symbol')}
+        live_from = equity['Date'].iloc[-1] + timedelta(days=1) if not equity.empty else None
+        month_ends = months.set_index(pd.to_datetime(months['Date'], format='%Y-%m-%d'))['Equity']
+        return Snapshots(equity, closes, live_from, month_ends)
+
+    def positions(self, portfolio, day):
+        with self._connect() as conn:
+            if f"{pd.Timestamp(day):%Y-%m-%d}" >= self._valid_until(conn, portfolio):
+                return pd.DataFrame(columns=['Ticker', 'Shares', 'Cost', 'Close', 'Value'])
+            return pd.read_sql_query(
+                'SELECT ticker AS "Ticker", shares AS "Shares", cost AS "Cost", close AS "Close", value AS "Value" '
+                'FROM snapshot_positions WHERE portfolio = ? AND date = ? ORDER BY ticker',
+                conn, params=(portfolio, f"{pd.Timestamp(day):%Y-%m-%d}"))
+
+    def materialize(self, portfolio=DEFAULT_PORTFOLIO, through=None):
+        """Append closed days up to `through`, first redoing any days a ledger edit invalidated.
+
+        Prices come from the local price store only; sync it first for fresh closes.
+        Returns the (first, last) day written, or None.
+        """
+        through = pd.Timestamp(through or last_closed_day()).normalize()
+        with self._connect() as conn:
+            revision = int(self._meta(conn, f"revision:{portfolio}") or 0)
+            changed_from = self._meta(conn, f"changed_from:{portfolio}")
+            last = conn.execute('SELECT max(date) FROM snapshot_days WHERE portfolio = ?', (portfolio,)).fetchone()[0]
+        if last is not None:
+            next_day = pd.Timestamp(last) + timedelta(days=1)
+            if not changed_from and next_day > through:
+                return None
+            start = min(pd.Timestamp(changed_from), next_day) if changed_from else next_day
+        else:
+            start = None
+
+        trades_df = TradeStore(self.path, csv_path=None, portfolio=portfolio).load_frame()
+        tickers = trades_df['Stock Name'].astype(str).str.strip().str.upper()
+        closes = {s: self.prices.read(s)['Close'] for s in set(tickers) | set(self.benchmarks)}
+        days, positions = calculate_daily_snapshots(trades_df, tickers, closes, start, through)
+
+        day_rows = list(zip(pd.DatetimeIndex(days['Date']).strftime('%Y-%m-%d'), days['Equity'],
+                            days['Invested'], days['Realized P&L'], days['Market Value']))
+        position_rows = list(zip(pd.DatetimeIndex(positions['Date']).strftime('%Y-%m-%d'), positions['Ticker'],
+                                 positions['Shares'], positions['Cost'], positions['Close'], positions['Value']))
+        benchmark_rows = []
+        if not days.empty:
+            for symbol in self.benchmarks:
+                close = closes[symbol].loc[days['Date'].iloc[0]:days['Date'].iloc[-1]].dropna()
+                benchmark_rows += zip(close.index.strftime('%Y-%m-%d'), [symbol] * len(close), close)
+
+        first = f"{start:%Y-%m-%d}" if start is not None else '0000-00-00'
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # A write since the ledger was read leaves everything for the next run
+            if int(self._meta(conn, f"revision:{portfolio}") or 0) != revision:
+                return None
+            for table in ('snapshot_days', 'snapshot_positions', 'snapshot_benchmarks', 'snapshot_months'):
+                conn.execute(f'DELETE FROM {table} WHERE portfolio = ? AND date >= ?', (portfolio, first))
+            conn.executemany('INSERT INTO snapshot_days VALUES (?, ?, ?, ?, ?, ?)',
+                             [(portfolio, *row) for row in day_rows])
+            conn.executemany('INSERT INTO snapshot_positions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             [(portfolio, *row) for row in position_rows])
+            conn.executemany('INSERT INTO snapshot_benchmarks VALUES (?, ?, ?, ?)',
+                             [(portfolio, *row) for row in benchmark_rows])
+            # Days are contiguous, so a stored calendar month end closes its month; the scan
+            # starts after the last month kept, which also fills months for older databases
+            conn.execute("INSERT INTO snapshot_months SELECT portfolio, date, equity FROM snapshot_days "
+                         "WHERE portfolio = ? AND date > (SELECT coalesce(max(date), '') FROM snapshot_months "
+                         "WHERE portfolio = ?) AND date = date(date, 'start of month', '+1 month', '-1 day')",
+                         (portfolio, portfolio))
+            conn.execute('DELETE FROM meta WHERE key = ?', (f"changed_from:{portfolio}",))
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, '0')", (f"snapshots:{portfolio}",))
+            conn.execute('UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = ?',
+                         (f"snapshots:{portfolio}",))
+        return (days['Date'].iloc[0], days['Date'].iloc[-1]) if not days.empty else None
+
+    def rebuild(self, portfolio=DEFAULT_PORTFOLIO):
+        """Redo the days from a ledger edit's earliest date through the last snapshot, adding none."""
+        with self._connect() as conn:
+            changed = self._meta(conn, f"changed_from:{portfolio}") is not None
+            last = conn.execute('SELECT max(date) FROM snapshot_days WHERE portfolio = ?', (portfolio,)).fetchone()[0]
+        if changed and last is not None:
+            return self.materialize(portfolio, last)
+        return None
+
+
+def run(db_path=DB_PATH, portfolios=None, through=None, sync=True):
+    store = SnapshotStore(db_path)
+    portfolios = portfolios or TradeStore(db_path, csv_path=None).portfolios()
+    for portfolio in portfolios:
+        if sync:
+            trades_df = TradeStore(db_path, csv_path=None, portfolio=portfolio).load_frame()
+            first_entry = pd.to_datetime(trades_df['Entry Date'], errors='coerce').min()
+            if pd.notna(first_entry):
+                tickers = trades_df['Stock Name'].dropna().astype(str).str.strip().str.upper().unique()
+                store.prices.sync(list(tickers) + list(store.benchmarks), first_entry)
+        written = store.materialize(portfolio, through)
+        if written:
+            print(f"[{datetime.now():%H:%M:%S}] {portfolio}: snapshots {written[0]:%Y-%m-%d} .. {written[1]:%Y-%m-%d}")
+        else:
+            print(f"[{datetime.now():%H:%M:%S}] {portfolio}: up to date")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize end-of-day equity, position and benchmark snapshots.")
+    parser.add_argument('--db', default=DB_PATH, help='trade store to snapshot')
+    parser.add_argument('--portfolio', action='append', help='portfolio to snapshot (repeatable; default all)')
+    parser.add_argument('--through', help='last day to materialize, YYYY-MM-DD (default: last closed session)')
+    parser.add_argument('--no-sync', action='store_true', help="use the price store as is, don't fetch new bars")
+    args = parser.parse_args()
+    run(args.db, args.portfolio, args.through, sync=not args.no_sync)
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Offline and isolated: the fake market provider, and caches/price files in a scratch directory.
+# Set before any app module is imported, since they read these at import time.
+_scratch = tempfile.mkdtemp(prefix='pnl-tests-')
+os.environ['MARKET_DATA_PROVIDER'] = 'fake'
+os.environ['MARKET_CACHE_DIR'] = os.path.join(_scratch, 'cache')
+os.environ['PRICE_STORE_DIR'] = os.path.join(_scratch, 'prices')
+os.environ['ALERT_LOG'] = os.path.join(_scratch, 'alerts.jsonl')
@@ -0,0 +1,73 @@
+import pytest
+
+from alerts import AlertEngine, read_log
+from analytics import calculate_positions
+from trade_store import TradeStore
+
+TRADES = [
+    {'Stock Name': 'AAPL', 'Entry Date': '2024-01-02', 'Entry Price': 100, 'Capital': 1000,
+     'Sell Target 1': 110, 'Sell Target 2': 120},
+    {'Stock Name': 'MSFT', 'Entry Date': '2024-01-02', 'Entry Price': 300, 'Capital': 3000,
+     'Sell Target 1': 330},
+    # Closed positions are not watched
+    {'Stock Name': 'NVDA', 'Entry Date': '2024-01-02', 'Entry Price': 50, 'Capital': 500,
+     'Sell Date': '2024-02-01', 'Sell Price': 60, 'Sell %': 100, 'Sell Target 1': 55},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TradeStore(str(tmp_path / 'trades.db'), csv_path=None)
+    for trade in TRADES:
+        store.add_trade(dict(trade))
+    return store
+
+
+def engine_for(store, log_path):
+    trades_df = store.load_frame()
+    tickers = trades_df['Stock Name'].str.upper()
+    positions = calculate_positions(trades_df, [float('nan')] * len(trades_df))
+    return AlertEngine('default', trades_df, tickers, positions, log_path=log_path)
+
+
+def fired(alerts):
+    return sorted((a.ticker, a.level) for a in alerts)
+
+
+def test_targets_fire_once(store, tmp_path):
+    log = str(tmp_path / 'alerts.jsonl')
+    engine = engine_for(store, log)
+    assert len(engine) == 3
+    assert engine.evaluate({'AAPL': 105, 'MSFT': 300, 'NVDA': 70}) == []
+    assert fired(engine.evaluate({'AAPL': 112})) == [('AAPL', 1)]
+    # Still above, dipping and coming back, or unchanged: no repeat
+    assert engine.evaluate({'AAPL': 115}) == []
+    assert engine.evaluate({'AAPL': 104}) == []
+    assert engine.evaluate({'AAPL': 111}) == []
+    assert fired(engine.evaluate({'AAPL': 125, 'MSFT': 331})) == [('AAPL', 2), ('MSFT', 1)]
+    assert fired(read_log(log, 'default')) == [('AAPL', 1), ('AAPL', 2), ('MSFT', 1)]
+    assert len(engine.recent()) == 3
+
+
+def test_rebuilt_engine_remembers_fired_targets(store, tmp_path):
+    log = str(tmp_path / 'alerts.jsonl')
+    engine_for(store, log).evaluate({'AAPL': 112})
+    rebuilt = engine_for(store, log)
+    assert rebuilt.evaluate({'AAPL': 113}) == []
+    assert len(rebuilt.recent()) == 1
+
+
+def test_editing_a_target_arms_it_again(store, tmp_path):
+    log = str(tmp_path / 'alerts.jsonl')
+    engine_for(store, log).evaluate({'AAPL': 112})
+    df = store.load_frame()
+    df.loc[df['Stock Name'] == 'AAPL', 'Sell Target 1'] = 111
+    store.save_frame(df)
+    alerts = engine_for(store, log).evaluate({'AAPL': 112})
+    assert [(a.ticker, a.level, a.target) for a in alerts] == [('AAPL', 1, 111.0)]
+
+
+def test_logs_are_per_portfolio(store, tmp_path):
+    log = str(tmp_path / 'alerts.jsonl')
+    engine_for(store, log).evaluate({'AAPL': 112})
+    assert read_log(log, 'other') == []
@@ -0,0 +1,58 @@
+import pytest
+
+from analytics import calculate_positions
+from lots import build_lots, aggregate_lots, summarize_holdings
+from trade_store import TradeStore
+
+TRADES = [
+    {'Stock Name': 'AAPL', 'Entry Date': '2024-01-02', 'Entry Price': 100, 'Capital': 1000},
+    # The sell is recorded on the second lot, but FIFO matches it against the first
+    {'Stock Name': 'AAPL', 'Entry Date': '2024-02-01', 'Entry Price': 150, 'Capital': 1500,
+     'Sell Date': '2024-03-01', 'Sell Price': 200, 'Sell %': 50},
+    {'Stock Name': 'AAPL', 'Entry Date': '2024-04-01', 'Entry Price': 120, 'Capital': 1200},
+    {'Stock Name': 'MSFT', 'Entry Date': '2024-01-10', 'Entry Price': 300, 'Capital': 3000,
+     'Sell Date': '2024-05-01', 'Sell Price': 330, 'Sell %': 100},
+]
+PRICES = {'AAPL': 180.0, 'MSFT': 400.0}
+
+
+@pytest.fixture
+def lots(tmp_path):
+    store = TradeStore(str(tmp_path / 'trades.db'), csv_path=None)
+    for trade in TRADES:
+        store.add_trade(dict(trade))
+    trades_df = store.load_frame()
+    tickers = trades_df['Stock Name'].str.upper()
+    positions = calculate_positions(trades_df, tickers.map(PRICES).astype(float))
+    return build_lots(trades_df, tickers, positions)
+
+
+def test_sold_shares_are_matched_oldest_lot_first(lots):
+    aapl = lots[lots['ticker'] == 'AAPL']
+    assert list(aapl['entry_date'].dt.strftime('%Y-%m-%d')) == ['2024-01-02', '2024-02-01', '2024-04-01']
+    assert list(aapl['fifo_sold']) == pytest.approx([5, 0, 0])
+    assert list(aapl['fifo_remaining']) == pytest.approx([5, 10, 10])
+
+
+def test_holdings_use_fifo_cost(lots):
+    holdings = aggregate_lots(lots, PRICES)
+    aapl = holdings.loc['AAPL']
+    assert aapl['lots'] == 3
+    assert aapl['remaining_shares'] == pytest.approx(25)
+    assert aapl['realized_pnl'] == pytest.approx(5 * (200 - 100))
+    assert aapl['remaining_cost'] == pytest.approx(3700 - 500)
+    assert aapl['avg_cost'] == pytest.approx(3200 / 25)
+    assert aapl['unrealized_pnl'] == pytest.approx(25 * 180 - 3200)
+    assert aapl['type'] == 'PARTIAL'
+
+    msft = holdings.loc['MSFT']
+    assert msft['type'] == 'CLOSED'
+    assert msft['remaining_shares'] == 0 and msft['current_value'] == 0
+    assert msft['realized_pnl'] == pytest.approx(10 * 30)
+
+
+def test_summary_adds_up(lots):
+    totals = summarize_holdings(aggregate_lots(lots, PRICES))
+    assert totals['total_invested'] == pytest.approx(6700)
+    assert totals['total_realized'] == pytest.approx(800)
+    assert totals['total_pnl'] == pytest.approx(800 + 25 * 180 - 3200)
@@ -0,0 +1,41 @@
+import threading
+
+import pandas as pd
+
+import market_data
+from fake_market import fake_recent_closes
+from quote_cache import market_cache
+
+
+def test_misses_are_fetched_in_chunks(monkeypatch):
+    calls = []
+
+    def recent_closes(tickers, timeout):
+        calls.append(list(tickers))
+        return fake_recent_closes(tickers, timeout)
+
+    monkeypatch.setattr(market_data, '_recent_closes', recent_closes)
+    monkeypatch.setattr(market_data, 'QUOTE_CHUNK_SIZE', 4)
+    tickers = [f"CHK{i}" for i in range(10)]
+    quotes = market_data.get_stock_quotes(tickers)
+    assert sorted(quotes) == tickers
+    assert [len(c) for c in calls] == [4, 4, 2]
+
+    # Cached now: no further downloads
+    market_data.get_stock_quotes(tickers)
+    assert len(calls) == 3
+    assert quotes['CHK0'] == market_data.get_stock_data('CHK0') + (False,)
+
+
+def test_deadline_falls_back_to_last_known(monkeypatch):
+    release = threading.Event()
+
+    def slow_closes(tickers, timeout):
+        release.wait(5)
+        return {t: pd.Series([1.0, 2.0]) for t in tickers}
+
+    market_cache.set("last:SLOW", market_data.Quote(10.0, 9.0, False), market_data.LAST_KNOWN_TTL)
+    monkeypatch.setattr(market_data, '_recent_closes', slow_closes)
+    quotes = market_data.get_stock_quotes(['SLOW', 'NEVER'], deadline=0.2)
+    assert quotes == {'SLOW': market_data.Quote(10.0, 9.0, True)}
+    release.set()
@@ -0,0 +1,90 @@
+import sys
+import types
+
+import pandas as pd
+
+from fake_market import fake_daily_bars, fake_intraday_bars
+from intraday import IntradayBars
+from price_store import PriceStore, bulk_fetch, yahoo_bars
+
+
+class Recorder:
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self.calls = []
+
+    def __call__(self, symbols, start, **kwargs):
+        self.calls.append((list(symbols), pd.Timestamp(start), kwargs))
+        return self.fetcher(symbols, start, **kwargs)
+
+
+def test_bulk_fetch_groups_by_start_and_chunks():
+    fetcher = Recorder(fake_daily_bars)
+    starts = {'A': pd.Timestamp('2024-01-02'), 'B': pd.Timestamp('2024-01-02'),
+              'C': pd.Timestamp('2024-01-02'), 'D': pd.Timestamp('2024-03-01')}
+    replies = list(bulk_fetch(fetcher, starts, 'history', chunk_size=2, end='2024-03-05'))
+    assert [(c, str(s.date())) for c, s, _ in replies] == [
+        (['A', 'B'], '2024-01-02'), (['C'], '2024-01-02'), (['D'], '2024-03-01')]
+    assert all(kwargs == {'end': '2024-03-05'} for _, _, kwargs in fetcher.calls)
+
+
+def test_yahoo_bars_splits_one_download(monkeypatch):
+    index = pd.DatetimeIndex(['2024-03-01 14:30', '2024-03-01 14:31'], tz='UTC')
+    columns = pd.MultiIndex.from_product([['AAA', 'BBB'], ['Close']])
+    hist = pd.DataFrame([[1.0, None], [2.0, None]], index=index, columns=columns)
+    calls = []
+
+    def download(symbols, **kwargs):
+        calls.append((symbols, kwargs['interval']))
+        return hist
+
+    monkeypatch.setitem(sys.modules, 'yfinance', types.SimpleNamespace(download=download))
+    bars = yahoo_bars(['AAA', 'BBB', 'CCC'], '2024-03-01', interval='1m')
+    assert calls == [(['AAA', 'BBB', 'CCC'], '1m')]
+    assert list(bars) == ['AAA']
+    assert list(bars['AAA'].index) == [pd.Timestamp('2024-03-01 09:30'), pd.Timestamp('2024-03-01 09:31')]
+
+
+def test_price_store_and_intraday_share_the_helper(tmp_path):
+    daily = Recorder(fake_daily_bars)
+    store = PriceStore(str(tmp_path), fetcher=daily)
+    store.sync(['aapl', 'MSFT'], '2024-01-02')
+    assert [c[0] for c in daily.calls] == [['AAPL', 'MSFT']]
+    assert set(daily.calls[0][2]) == {'end'}
+
+    intraday = Recorder(fake_intraday_bars)
+    bars = IntradayBars(fetcher=intraday)
+    start = pd.Timestamp.now().normalize() - pd.Timedelta(days=3)
+    bars.closes(['AAPL', 'MSFT'], start, '5m')
+    assert [(c[0], c[2]) for c in intraday.calls] == [(['AAPL', 'MSFT'], {'interval': '5m'})]
+
+
+def test_earlier_start_fetches_only_the_gap(tmp_path):
+    fetcher = Recorder(fake_daily_bars)
+    store = PriceStore(str(tmp_path), fetcher=fetcher)
+    store.sync(['AAPL'], '2024-06-03')
+    fetcher.calls.clear()
+
+    store.sync(['AAPL'], '2024-01-02')
+    assert [(c[1], c[2]['end']) for c in fetcher.calls] == [(pd.Timestamp('2024-01-02'), pd.Timestamp('2024-06-03'))]
+    bars = store.read('AAPL')
+    pd.testing.assert_frame_equal(bars.loc[:'2024-09-30'], fake_daily_bars(['AAPL'], '2024-01-02', '2024-09-30')['AAPL'],
+                                  check_freq=False, check_dtype=False)
+    assert store.history('AAPL', '2024-01-02').index[0] == pd.Timestamp('2024-01-02')
+
+
+def test_refresh_is_throttled_per_symbol(tmp_path):
+    fetcher = Recorder(fake_daily_bars)
+    store = PriceStore(str(tmp_path), fetcher=fetcher)
+    store.sync(['AAPL', 'MSFT'], '2024-01-02')
+    fetcher.calls.clear()
+
+    # A later start, or the same one, within MIN_REFRESH is not refetched
+    store.sync(['AAPL'], '2024-03-01')
+    store.sync(['AAPL', 'MSFT'], '2024-01-02')
+    assert fetcher.calls == []
+
+    # Once the throttle lapses only the bars from the last stored one are asked for
+    store._synced_at = {s: (0, start) for s, (_, start) in store._synced_at.items()}
+    store.sync(['AAPL', 'MSFT'], '2024-01-02')
+    assert [(c[0], c[1]) for c in fetcher.calls] == [(['AAPL', 'MSFT'], store.read('AAPL').index[-1])]
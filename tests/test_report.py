@@ -0,0 +1,48 @@
+import json
+import os
+
+import pandas as pd
+
+import report
+
+LEDGER = pd.DataFrame({
+    'Stock Name': ['AAPL', 'MSFT', 'AAPL'],
+    'Entry Date': ['2024-01-02', '2024-02-01', '2024-03-01'],
+    'Entry Price': [100.0, 200.0, 110.0],
+    'Capital': [1000.0, 2000.0, 1100.0],
+    'Sell Date': ['2024-02-15', '', ''],
+    'Sell Price': [120.0, None, None],
+    'Sell %': [100, 0, 0],
+    'Trade Status': ['CLOSED', 'OPEN', 'OPEN'],
+})
+
+
+def write_ledger(path, rows):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    LEDGER.head(rows).to_csv(path, index=False)
+    return path
+
+
+def test_ledger_names_are_unique():
+    paths = ['a/trades.csv', 'b/trades.csv', 'b/trades.csv', 'c/other.db', 'x/a/trades.csv']
+    names = report.ledger_names(paths)
+    assert len(set(names)) == len(names)
+    assert names[0] == 'a-trades' and names[1] == 'b-trades' and names[3] == 'other'
+
+
+def test_same_file_name_ledgers_get_separate_reports(tmp_path, capsys):
+    first = write_ledger(str(tmp_path / 'a' / 'trades.csv'), 3)
+    second = write_ledger(str(tmp_path / 'b' / 'trades.csv'), 1)
+    report.main([first, second, '--prices', 'none'])
+    reports = json.loads(capsys.readouterr().out)
+    assert sorted(reports) == ['a-trades', 'b-trades']
+    assert reports['a-trades']['metrics']['trades'] == 3
+    assert reports['b-trades']['metrics']['trades'] == 1
+
+
+def test_csv_output_does_not_overwrite(tmp_path):
+    first = write_ledger(str(tmp_path / 'a' / 'trades.csv'), 3)
+    second = write_ledger(str(tmp_path / 'b' / 'trades.csv'), 1)
+    out = tmp_path / 'out'
+    report.main([first, second, '--prices', 'none', '--format', 'csv', '--out', str(out)])
+    assert {'a-trades-positions.csv', 'b-trades-positions.csv'} <= set(os.listdir(out))
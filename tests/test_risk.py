@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import calculate_sharpe_ratio, calculate_max_drawdown
+from fake_market import fake_history
+from risk import RiskEngine
+
+BENCHMARKS = ('SPY', 'QQQ')
+
+
+@pytest.fixture
+def curve():
+    closes = fake_history('CURVE', '2022-01-03', '2024-06-28')['Close']
+    equity = closes.to_numpy() * 100
+    equity[:5] = 0  # nothing invested yet: those returns are skipped
+    return pd.DataFrame({'Date': closes.index, 'Equity': equity})
+
+
+@pytest.fixture
+def benchmark_closes():
+    return {s: fake_history(s, '2021-12-01', '2024-06-28')['Close'] for s in BENCHMARKS}
+
+
+def assert_same(a, b):
+    ma, mb = a.metrics(), b.metrics()
+    for key in ma:
+        if key != 'benchmarks':
+            assert ma[key] == pytest.approx(mb[key], rel=1e-9, abs=1e-12), key
+    for name in BENCHMARKS:
+        for stat, value in ma['benchmarks'][name].items():
+            assert value == pytest.approx(mb['benchmarks'][name][stat], rel=1e-9), (name, stat)
+
+
+def test_incremental_days_match_a_backfill(curve, benchmark_closes):
+    backfilled = RiskEngine(BENCHMARKS).extend(curve, benchmark_closes)
+
+    incremental = RiskEngine(BENCHMARKS).extend(curve.iloc[:200], benchmark_closes)
+    for end in (201, 350, 500, len(curve)):
+        incremental.extend(curve.iloc[:end], benchmark_closes)
+    assert_same(incremental, backfilled)
+    pd.testing.assert_frame_equal(incremental.rolling_frame(), backfilled.rolling_frame(), rtol=1e-7)
+
+
+def test_with_day_leaves_the_engine_alone(curve, benchmark_closes):
+    engine = RiskEngine(BENCHMARKS).extend(curve.iloc[:-1], benchmark_closes)
+    live = engine.with_day(curve['Date'].iloc[-1], curve['Equity'].iloc[-1],
+                           {s: c.iloc[-1] for s, c in benchmark_closes.items()})
+    assert_same(engine, RiskEngine(BENCHMARKS).extend(curve.iloc[:-1], benchmark_closes))
+    assert engine.last_date == curve['Date'].iloc[-2]
+    assert_same(live, RiskEngine(BENCHMARKS).extend(curve, benchmark_closes))
+
+
+def test_matches_the_plain_calculations(curve):
+    engine = RiskEngine().extend(curve)
+    returns = curve['Equity'].pct_change().replace([np.inf, -np.inf], np.nan).dropna()
+    assert engine.sharpe == pytest.approx(calculate_sharpe_ratio(returns))
+    assert engine.max_drawdown == pytest.approx(calculate_max_drawdown(curve[curve['Equity'] > 0]))
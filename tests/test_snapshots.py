@@ -0,0 +1,99 @@
+import time
+
+import pandas as pd
+import pytest
+
+from analytics import calculate_equity_curve, calculate_monthly_performance
+from fake_market import fake_daily_bars
+from price_store import PriceStore, exchange_now
+from snapshots import SnapshotStore, last_closed_day
+from trade_store import TradeStore
+
+TRADES = [
+    {'Stock Name': 'AAPL', 'Entry Date': '2024-01-10', 'Entry Price': 100, 'Capital': 5000,
+     'Sell Date': '2024-06-03', 'Sell Price': 120, 'Sell %': 100},
+    {'Stock Name': 'MSFT', 'Entry Date': '2024-02-05', 'Entry Price': 300, 'Capital': 9000},
+    {'Stock Name': 'AAPL', 'Entry Date': '2024-05-15', 'Entry Price': 110, 'Capital': 2200,
+     'Sell Date': '2024-09-20', 'Sell Price': 90, 'Sell %': 50},
+]
+THROUGH = '2024-11-15'
+
+
+@pytest.fixture
+def stores(tmp_path):
+    path = str(tmp_path / 'trades.db')
+    trades = TradeStore(path, csv_path=None)
+    for trade in TRADES:
+        trades.add_trade(dict(trade))
+    prices = PriceStore(str(tmp_path / 'prices'), fetcher=fake_daily_bars)
+    prices.sync(['AAPL', 'MSFT', 'SPY', 'QQQ'], '2024-01-01')
+    snapshots = SnapshotStore(path, prices=prices)
+    snapshots.materialize(through=THROUGH)
+    return trades, snapshots
+
+
+def fresh_curve(trades):
+    return calculate_equity_curve(trades.load_frame(), end=THROUGH)
+
+
+def test_snapshots_match_a_fresh_curve(stores):
+    trades, snapshots = stores
+    snap = snapshots.read('default')
+    pd.testing.assert_frame_equal(snap.equity, fresh_curve(trades))
+    assert snap.live_from == pd.Timestamp(THROUGH) + pd.Timedelta(days=1)
+    assert list(snap.month_ends.index.strftime('%Y-%m-%d')) == [
+        '2024-01-31', '2024-02-29', '2024-03-31', '2024-04-30', '2024-05-31',
+        '2024-06-30', '2024-07-31', '2024-08-31', '2024-09-30', '2024-10-31']
+
+
+def test_closed_months_give_the_full_table(stores):
+    trades, snapshots = stores
+    snap = snapshots.read('default')
+    live = calculate_equity_curve(trades.load_frame(), start=snap.live_from)
+    curve = pd.concat([snap.equity, live], ignore_index=True)
+    full = calculate_monthly_performance(trades.load_frame(), calculate_equity_curve(trades.load_frame()))
+    pd.testing.assert_frame_equal(calculate_monthly_performance(trades.load_frame(), curve, snap.month_ends), full)
+
+
+def test_past_edit_invalidates_then_rebuilds(stores):
+    trades, snapshots = stores
+    version = snapshots.version('default')
+    df = trades.load_frame()
+    df.loc[df['Stock Name'] == 'MSFT', 'Capital'] = 12000
+    trades.save_frame(df)
+
+    # Days and month ends from the edited entry date on are hidden until rebuilt
+    snap = snapshots.read('default')
+    assert snap.equity['Date'].iloc[-1] == pd.Timestamp('2024-02-04')
+    assert snap.month_ends.index[-1] == pd.Timestamp('2024-01-31')
+    assert snapshots.positions('default', '2024-03-01').empty
+
+    snapshots.rebuild('default')
+    snap = snapshots.read('default')
+    assert snapshots.version('default') > version
+    pd.testing.assert_frame_equal(snap.equity, fresh_curve(trades))
+    assert len(snap.month_ends) == 10
+    assert snap.month_ends['2024-03-31'] == snap.equity.set_index('Date')['Equity']['2024-03-31']
+    held = snapshots.positions('default', '2024-03-01').set_index('Ticker')
+    assert held.loc['MSFT', 'Cost'] == pytest.approx(12000)
+
+
+def test_rebuild_without_edit_is_a_no_op(stores):
+    _, snapshots = stores
+    version = snapshots.version('default')
+    assert snapshots.rebuild('default') is None
+    assert snapshots.version('default') == version
+
+
+def test_days_close_on_the_exchange_clock(monkeypatch):
+    assert last_closed_day('2024-03-05 15:59') == pd.Timestamp('2024-03-04')
+    assert last_closed_day('2024-03-05 16:00') == pd.Timestamp('2024-03-05')
+    # A server far from New York still sees New York's date
+    monkeypatch.setenv('TZ', 'Pacific/Kiritimati')
+    time.tzset()
+    try:
+        expected = pd.Timestamp.now(tz='America/New_York').tz_localize(None)
+        assert abs(exchange_now() - expected) < pd.Timedelta(seconds=5)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
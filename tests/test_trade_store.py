@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.ledger import DATE_STYLES
+from trade_store import DATE_FORMATS, parse_date_column, parse_date_strict
+
+FORMATS = [fmt if fmt != 'ISO8601' else '%Y-%m-%d' for fmt in DATE_FORMATS]
+
+
+def strict(texts):
+    return pd.to_datetime(pd.Series([parse_date_strict(t) for t in texts], dtype=object), errors='coerce')
+
+
+def assert_parity(texts):
+    got = parse_date_column(pd.Series(texts, dtype=object))
+    expected = strict(texts)
+    mismatched = [(t, g, e) for t, g, e in zip(texts, got, expected) if not (g == e or (pd.isna(g) and pd.isna(e)))]
+    assert not mismatched, mismatched[:10]
+
+
+def random_dates(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.Timestamp('1995-01-01') + pd.to_timedelta(rng.integers(0, 12_000, n), unit='D')
+
+
+@pytest.mark.parametrize('fmt', FORMATS)
+def test_single_format_column_matches_strict(fmt):
+    assert_parity([d.strftime(fmt) for d in random_dates(400)])
+
+
+def test_mixed_formats_match_strict():
+    rng = np.random.default_rng(1)
+    dates = random_dates(2000, seed=1)
+    texts = [d.strftime(FORMATS[i]) for d, i in zip(dates, rng.integers(0, len(FORMATS), len(dates)))]
+    assert_parity(texts + ['', None, 'nan', 'garbage', '2024-02-30', '31/31/2024'])
+
+
+def test_ambiguous_dash_dates_are_month_first():
+    # A column dominated by unambiguous day-first dates still reads 08-04-2025 as August 4th
+    texts = ['25-12-2024', '31-01-2025', '13-03-2025', '08-04-2025', '04-08-25']
+    got = parse_date_column(pd.Series(texts))
+    assert list(got.dt.strftime('%Y-%m-%d')) == ['2024-12-25', '2025-01-31', '2025-03-13', '2025-08-04', '2025-04-08']
+    assert_parity(texts)
+
+
+def test_generated_ledger_dates_round_trip():
+    dates = random_dates(500, seed=2)
+    for fmt, _ in DATE_STYLES:
+        got = parse_date_column(pd.Series([d.strftime(fmt) for d in dates]))
+        assert (got.to_numpy() == dates.to_numpy()).all(), fmt
@@ -1,52 +1,149 @@
-import csv
 import os
-from datetime import datetime
+from collections import namedtuple
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from trade_store import TradeStore, DB_PATH, DEFAULT_PORTFOLIO, normalize_frame
+
+PORTFOLIO_VALUE = float(os.environ.get('PORTFOLIO_VALUE', 100000))
+IMPORT_BATCH_SIZE = 10000
+# Broker export headers -> ledger columns
+COLUMN_ALIASES = {
+    'Symbol': 'Stock Name', 'Ticker': 'Stock Name',
+    'Buy Date': 'Entry Date', 'Trade Date': 'Entry Date', 'Date': 'Entry Date',
+    'Price': 'Entry Price', 'Buy Price': 'Entry Price', 'Fill Price': 'Entry Price',
+    'Qty': 'Quantity', 'Shares': 'Quantity',
+    'Type': 'Trade Type', 'Status': 'Trade Status',
+}
+
+ImportResult = namedtuple('ImportResult', ['imported', 'rejected', 'realized_pnl', 'portfolio_impact'])
+
+
+def _blank(values):
+    return values.isna() | (values.astype(str).str.strip() == '')
+
 
 class TradeManager:
-    def __init__(self, filename='trades.csv'):
+    def __init__(self, filename='trades.csv', db_path=DB_PATH, portfolio_value=PORTFOLIO_VALUE, portfolio=DEFAULT_PORTFOLIO):
+        # trades.csv is only read once, to seed an empty store
         self.filename = filename
-        self.headers = [
-            'Stock Name', 'Trade Type', 'Entry Price', 'Entry Date',
-            'Buy Date', 'Sell Date', 'Sell Price', 'Sell Target 1',
-            'Sell Target 2', 'Sell Target 3', 'P&L %', 'P&L Amt',
-            'Portfolio Impact'
-        ]
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        if not os.path.exists(self.filename):
-            with open(self.filename, 'w', newline='') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(self.headers)
+        self.store = TradeStore(db_path, csv_path=filename, portfolio=portfolio)
+        self.portfolio_value = portfolio_value
 
     def add_trade(self, trade_data):
-        # Calculate P&L if sell price exists
-        if trade_data.get('Sell Price') and trade_data.get('Entry Price'):
+        # The dashboard sizes positions by Capital; derive it from the quantity when not given
+        if not trade_data.get('Capital') and trade_data.get('Entry Price'):
             try:
-                entry_price = float(trade_data['Entry Price'])
-                sell_price = float(trade_data['Sell Price'])
-                quantity = float(trade_data.get('Quantity', 1)) # Assuming 1 if not specified
+                trade_data['Capital'] = float(trade_data['Entry Price']) * float(trade_data.get('Quantity', 1))
+            except ValueError:
+                pass
+        if not trade_data.get('Entry Date'):
+            trade_data['Entry Date'] = trade_data.get('Buy Date', '')
+        if trade_data.get('Sell Price') and not trade_data.get('Sell %'):
+            trade_data['Sell %'] = 100
 
-                pnl_amt = (sell_price - entry_price) * quantity
-                pnl_percent = ((sell_price - entry_price) / entry_price) * 100
-                
-                trade_data['P&L Amt'] = f"{pnl_amt:.2f}"
-                trade_data['P&L %'] = f"{pnl_percent:.2f}%"
+        self.store.add_trade(trade_data)
+        print("Trade added successfully!")
 
-                # Calculate Portfolio Impact (Placeholder logic, needs user's total portfolio value)
-                total_portfolio_value = 100000 # Example default
-                impact = (pnl_amt / total_portfolio_value) * 100
-                trade_data['Portfolio Impact'] = f"{impact:.2f}%"
+    def _prepare_batch(self, raw):
+        """Map, validate and normalize one batch; returns (ledger rows, rejected rows, realized P&L)."""
+        df = raw.rename(columns=lambda c: str(c).strip())
+        for alias, col in COLUMN_ALIASES.items():
+            if alias not in df:
+                continue
+            # An alias only fills in where the ledger column itself is blank
+            df[col] = df[alias] if col not in df else df[col].where(~_blank(df[col]), df[alias])
+        for col in ['Stock Name', 'Entry Date', 'Entry Price', 'Capital', 'Quantity', 'Sell Price', 'Sell %', 'Sell Date']:
+            if col not in df:
+                df[col] = np.nan
 
-            except ValueError:
-                print("Error calculating P&L: Invalid price format.")
+        entry_price = pd.to_numeric(df['Entry Price'], errors='coerce')
+        quantity = pd.to_numeric(df['Quantity'], errors='coerce')
+        df['Capital'] = df['Capital'].where(~_blank(df['Capital']), entry_price * quantity)
+        df['Sell %'] = df['Sell %'].where(~_blank(df['Sell %']) | _blank(df['Sell Price']), 100)
+        rows = normalize_frame(df)
 
-        with open(self.filename, 'a', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=self.headers)
-            # Filter out extra keys not in headers
-            row = {k: trade_data.get(k, '') for k in self.headers}
-            writer.writerow(row)
-        print("Trade added successfully!")
+        side = df['Side'].astype(str).str.strip().str.upper() if 'Side' in df else pd.Series('', index=df.index)
+        reason = pd.Series(np.select([
+            side.isin(['SELL', 'S']),
+            rows['Stock Name'].isna(),
+            ~(rows['Entry Price'] > 0),
+            ~(rows['Capital'] > 0),
+            rows['Entry Date'].isna(),
+            rows['Sell Date'].isna() & ~_blank(df['Sell Date']),
+            ~_blank(df['Sell Price']) & ~(rows['Sell Price'] > 0),
+            ~rows['Sell %'].fillna(0).between(0, 100),
+        ], [
+            'sell fill: record sells on their lot (Sell Price / Sell %)',
+            'missing Stock Name',
+            'Entry Price must be a positive number',
+            'Capital (or Entry Price x Quantity) must be positive',
+            'missing or unreadable Entry Date',
+            'unreadable Sell Date',
+            'Sell Price must be a positive number',
+            'Sell % must be between 0 and 100',
+        ], ''), index=df.index)
+        ok = (reason == '').to_numpy()
+        rows = rows[ok]
+
+        sold = rows['Sell Price'].notna()
+        shares = rows['Capital'] / rows['Entry Price']
+        realized = ((rows['Sell Price'] - rows['Entry Price']) * shares * rows['Sell %'].fillna(0) / 100)[sold].sum()
+        rejected = raw[~ok].assign(Reason=reason[~ok])
+        return rows, rejected, realized
+
+    def add_trades(self, trades, batch_size=IMPORT_BATCH_SIZE):
+        """Bulk-add trade dicts or DataFrame chunks in one transaction; bad rows are reported, not written."""
+        if isinstance(trades, pd.DataFrame):
+            trades = [trades]
+        rejected, realized = [], 0.0
+
+        def batches():
+            nonlocal realized
+            it, offset = iter(trades), 0
+            while True:
+                first = next(it, None)
+                if first is None:
+                    return
+                if isinstance(first, pd.DataFrame):
+                    raw = first.reset_index(drop=True)
+                else:
+                    raw = pd.DataFrame([first] + list(islice(it, batch_size - 1)))
+                # Row numbers count data rows from 1, as in the source file
+                raw.index = pd.RangeIndex(offset + 1, offset + 1 + len(raw), name='Row')
+                offset += len(raw)
+                rows, bad, pnl = self._prepare_batch(raw)
+                rejected.append(bad)
+                realized += pnl
+                yield rows
+
+        imported = self.store.insert_frames(batches())
+        rejected = pd.concat(rejected) if rejected else pd.DataFrame(columns=['Reason'])
+        impact = realized / self.portfolio_value * 100 if self.portfolio_value else 0.0
+        return ImportResult(imported, rejected, realized, impact)
+
+    def import_file(self, path, batch_size=IMPORT_BATCH_SIZE, rejects_path=None):
+        """Stream a ledger CSV or broker export into the store in batches."""
+        chunks = pd.read_csv(path, dtype=str, keep_default_na=False, skipinitialspace=True, chunksize=batch_size)
+        result = self.add_trades(chunks, batch_size)
+        if rejects_path and not result.rejected.empty:
+            result.rejected.to_csv(rejects_path)
+        return result
+
+    def import_file_interactive(self):
+        path = input("CSV / broker export path: ").strip()
+        if not os.path.exists(path):
+            print("File not found.")
+            return
+        rejects_path = os.path.splitext(path)[0] + '.rejected.csv'
+        result = self.import_file(path, rejects_path=rejects_path)
+        print(f"Imported {result.imported} trades, rejected {len(result.rejected)}.")
+        print(f"Realized P&L in file: {result.realized_pnl:.2f} ({result.portfolio_impact:.2f}% of portfolio)")
+        if len(result.rejected):
+            print(f"Rejected rows written to {rejects_path}:")
+            print(result.rejected['Reason'].value_counts().to_string())
 
     def add_trade_interactive(self):
         print("Enter trade details:")
@@ -69,26 +166,54 @@ class TradeManager:
         
         self.add_trade(trade_data)
 
-    def list_trades(self):
-        if not os.path.exists(self.filename):
+    def list_trades(self, ticker=None, status=None, start=None, end=None, page_size=None):
+        """Print trades matching the filters; with page_size, pause after every page."""
+        header = f"{'Stock':<10} {'Type':<10} {'Entry Date':<12} {'Entry':<10} {'Sell':<10} {'P&L %':<10} {'P&L Amt':<10} {'Impact':<10}"
+        shown = 0
+        for trade in self.store.query(ticker=ticker, status=status, start=start, end=end):
+            if shown == 0:
+                print(header)
+                print("-" * 87)
+            pnl_pct = pnl_amt = impact = ''
+            if trade.sell_price is not None and trade.entry_price:
+                shares = trade.capital / trade.entry_price if trade.capital is not None else 1
+                sold_pct = trade.sell_pct if trade.sell_pct is not None else 100
+                amt = (trade.sell_price - trade.entry_price) * shares * sold_pct / 100
+                pnl_amt = f"{amt:.2f}"
+                pnl_pct = f"{(trade.sell_price - trade.entry_price) / trade.entry_price * 100:.2f}%"
+                impact = f"{amt / self.portfolio_value * 100:.2f}%"
+            entry_date = trade.entry_date.isoformat() if trade.entry_date else ''
+            print(f"{trade.stock_name:<10} {trade.trade_type or '':<10} {entry_date:<12} {trade.entry_price if trade.entry_price is not None else '':<10} "
+                  f"{trade.sell_price if trade.sell_price is not None else '':<10} {pnl_pct:<10} {pnl_amt:<10} {impact:<10}")
+            shown += 1
+            if page_size and shown % page_size == 0:
+                if input(f"-- {shown} shown, Enter for more, q to stop -- ").strip().lower() == 'q':
+                    return
+        if shown == 0:
             print("No trades found.")
-            return
 
-        with open(self.filename, 'r') as csvfile:
-            reader = csv.DictReader(csvfile)
-            print(f"{'Stock':<10} {'Type':<10} {'Entry':<10} {'Sell':<10} {'P&L %':<10} {'P&L Amt':<10} {'Impact':<10}")
-            print("-" * 75)
-            for row in reader:
-                print(f"{row.get('Stock Name', ''):<10} {row.get('Trade Type', ''):<10} {row.get('Entry Price', ''):<10} {row.get('Sell Price', ''):<10} {row.get('P&L %', ''):<10} {row.get('P&L Amt', ''):<10} {row.get('Portfolio Impact', ''):<10}")
+    def search_trades_interactive(self):
+        ticker = input("Ticker (blank = all): ").strip() or None
+        status = input("Status OPEN/PARTIAL/CLOSED, or 'held' for open + partial (blank = all): ").strip().upper() or None
+        if status == 'HELD':
+            status = ['OPEN', 'PARTIAL']
+        start = input("Entry date from (YYYY-MM-DD, blank = any): ").strip() or None
+        end = input("Entry date to (YYYY-MM-DD, blank = any): ").strip() or None
+        try:
+            self.list_trades(ticker=ticker, status=status, start=start, end=end, page_size=20)
+        except ValueError:
+            print("Invalid date.")
 
 if __name__ == "__main__":
-    manager = TradeManager()
+    manager = TradeManager(portfolio=os.environ.get('PORTFOLIO', DEFAULT_PORTFOLIO))
     
     while True:
         print("\n--- Trade Tracker ---")
         print("1. Add Trade")
         print("2. List Trades")
-        print("3. Exit")
+        print("3. Search Trades")
+        print("4. Import File")
+        print("5. Exit")
         
         choice = input("Select an option: ")
         
@@ -97,6 +222,10 @@ if __name__ == "__main__":
         elif choice == '2':
             manager.list_trades()
         elif choice == '3':
+            manager.search_trades_interactive()
+        elif choice == '4':
+            manager.import_file_interactive()
+        elif choice == '5':
             break
         else:
             print("Invalid choice. Please try again.")
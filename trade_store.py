@@ -0,0 +1,401 @@
+import os
+import sqlite3
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+DB_PATH = os.environ.get('TRADES_DB', 'trades.db')
+CSV_PATH = 'trades.csv'
+DEFAULT_PORTFOLIO = 'default'
+
+# Ledger column -> database column, in the order the dashboard shows them
+LEDGER_COLUMNS = {
+    'Stock Name': 'stock_name',
+    'Entry Date': 'entry_date',
+    'Entry Price': 'entry_price',
+    'Capital': 'capital',
+    'Sell Date': 'sell_date',
+    'Sell Price': 'sell_price',
+    'Sell %': 'sell_pct',
+    'Trade Status': 'trade_status',
+    'Sell Target 1': 'sell_target_1',
+    'Sell Target 2': 'sell_target_2',
+    'Sell Target 3': 'sell_target_3',
+    'Trade Type': 'trade_type',
+}
+DATE_COLUMNS = ['Entry Date', 'Sell Date']
+NUMERIC_COLUMNS = ['Entry Price', 'Capital', 'Sell Price', 'Sell %', 'Sell Target 1', 'Sell Target 2', 'Sell Target 3']
+TEXT_COLUMNS = ['Stock Name', 'Trade Status', 'Trade Type']
+
+# Typed record yielded by TradeStore.query: id plus the database columns, dates as datetime.date
+Trade = namedtuple('Trade', ['id'] + list(LEDGER_COLUMNS.values()))
+QUERY_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    stock_name TEXT NOT NULL,
+    entry_date TEXT,
+    entry_price REAL,
+    capital REAL,
+    sell_date TEXT,
+    sell_price REAL,
+    sell_pct REAL,
+    trade_status TEXT,
+    sell_target_1 REAL,
+    sell_target_2 REAL,
+    sell_target_3 REAL,
+    trade_type TEXT,
+    portfolio TEXT NOT NULL DEFAULT 'default'
+);
+CREATE INDEX IF NOT EXISTS idx_trades_stock_name ON trades (stock_name);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (trade_status);
+CREATE INDEX IF NOT EXISTS idx_trades_entry_date ON trades (entry_date);
+CREATE INDEX IF NOT EXISTS idx_trades_stock_entry ON trades (stock_name, entry_date);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('revision', '0');
+CREATE TABLE IF NOT EXISTS portfolios (name TEXT PRIMARY KEY);
+INSERT OR IGNORE INTO portfolios (name) VALUES ('default');
+"""
+
+
+def parse_date_strict(date_val):
+    if pd.isna(date_val) or str(date_val).strip() in ['', 'None', 'nan']:
+        return ''
+    date_str = str(date_val).strip()
+    try:
+        parsed = pd.to_datetime(date_str, dayfirst=False, errors='coerce')
+        if pd.notna(parsed):
+            return parsed.strftime('%Y-%m-%d')
+    except:
+        pass
+    formats = ['%Y-%m-%d', '%d/%m/%y', '%d/%m/%Y', '%m/%d/%Y', '%m/%d/%y', '%Y/%m/%d', '%d-%m-%Y', '%d-%m-%y']
+    for fmt in formats:
+        try:
+            parsed = datetime.strptime(date_str, fmt)
+            if parsed.year < 100:
+                parsed = parsed.replace(year=2000 + parsed.year)
+            return parsed.strftime('%Y-%m-%d')
+        except:
+            continue
+    return ''
+
+
+# Candidate formats for bulk parsing, in precedence order: like parse_date_strict, month-first
+# wherever that is a valid date, day-first only where it isn't
+DATE_FORMATS = ['ISO8601', '%m/%d/%Y', '%m/%d/%y', '%d/%m/%Y', '%d/%m/%y', '%Y/%m/%d',
+                '%m-%d-%Y', '%m-%d-%y', '%d-%m-%Y', '%d-%m-%y']
+FORMAT_SAMPLE_SIZE = 200
+
+
+def parse_date_column(values):
+    """Vectorized parse_date_strict: each format is tried once over the rows still unparsed, in order.
+
+    Formats that match nothing in a sample are skipped; rows left over fall back to parse_date_strict.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.dt.tz_localize(None).dt.normalize() if values.dt.tz is not None else values.dt.normalize()
+    text = values.astype(str).str.strip()
+    result = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    pending = values.notna() & ~text.isin(['', 'None', 'nan', 'NaT'])
+    if not pending.any():
+        return result
+
+    sample = text[pending].head(FORMAT_SAMPLE_SIZE)
+    for fmt in DATE_FORMATS:
+        if not pending.any():
+            break
+        if pd.to_datetime(sample, format=fmt, errors='coerce').isna().all():
+            continue
+        parsed = pd.to_datetime(text[pending], format=fmt, errors='coerce').dropna()
+        result[parsed.index] = parsed.dt.normalize()
+        pending[parsed.index] = False
+
+    if pending.any():
+        result[pending] = pd.to_datetime(text[pending].map(parse_date_strict), errors='coerce')
+    return result
+
+
+def derive_status(status, sell_pct, sell_price):
+    status = (status or '').upper().strip()
+    if status == 'CLOSED' or (sell_pct or 0) >= 100:
+        return 'CLOSED'
+    if (sell_pct or 0) > 0 and sell_price is not None:
+        return 'PARTIAL'
+    return 'OPEN'
+
+
+def derive_status_column(status, sell_pct, sell_price):
+    """Vectorized derive_status."""
+    status = status.fillna('').astype(str).str.upper().str.strip()
+    sell_pct = sell_pct.fillna(0)
+    closed = (status == 'CLOSED') | (sell_pct >= 100)
+    partial = ~closed & (sell_pct > 0) & sell_price.notna()
+    return pd.Series(np.select([closed, partial], ['CLOSED', 'PARTIAL'], 'OPEN'), index=status.index)
+
+
+def normalize_frame(df):
+    """Vectorized _to_row for a whole frame: ledger columns in order, NaN for blanks, ISO date strings."""
+    out = pd.DataFrame(index=df.index)
+    for col in TEXT_COLUMNS:
+        text = df[col].astype('string').str.strip() if col in df else pd.Series(pd.NA, index=df.index, dtype='string')
+        out[col] = text.where(text != '')
+    out['Stock Name'] = out['Stock Name'].str.upper()
+    for col in NUMERIC_COLUMNS:
+        out[col] = pd.to_numeric(df[col], errors='coerce') if col in df else np.nan
+    for col in DATE_COLUMNS:
+        out[col] = parse_date_column(df[col]).dt.strftime('%Y-%m-%d') if col in df else np.nan
+    out['Trade Status'] = derive_status_column(out['Trade Status'], out['Sell %'], out['Sell Price'])
+    return out[list(LEDGER_COLUMNS)]
+
+
+class TradeStore:
+    """SQLite-backed trade ledger shared by TradeManager and the dashboard.
+
+    Each store is scoped to one portfolio partition; portfolio=None reads across all of them
+    (the price poller) and writes to the default one.
+    """
+
+    def __init__(self, path=DB_PATH, csv_path=CSV_PATH, portfolio=DEFAULT_PORTFOLIO):
+        self.path = path
+        self.csv_path = csv_path
+        self.portfolio = portfolio
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if 'portfolio' not in [r['name'] for r in conn.execute('PRAGMA table_info(trades)')]:
+                # Ledgers from before portfolios existed all belong to the default one
+                conn.execute(f"ALTER TABLE trades ADD COLUMN portfolio TEXT NOT NULL DEFAULT '{DEFAULT_PORTFOLIO}'")
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_trades_portfolio ON trades (portfolio, stock_name, entry_date)')
+        self._import_csv_once()
+
+    @property
+    def _write_portfolio(self):
+        return self.portfolio or DEFAULT_PORTFOLIO
+
+    def _where(self, conditions=(), params=()):
+        conditions, params = list(conditions), list(params)
+        if self.portfolio is not None:
+            conditions.insert(0, 'portfolio = ?')
+            params.insert(0, self.portfolio)
+        return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _import_csv_once(self):
+        with self._connect() as conn:
+            done = conn.execute("SELECT value FROM meta WHERE key = 'csv_imported'").fetchone()
+            empty = conn.execute('SELECT COUNT(*) FROM trades').fetchone()[0] == 0
+        if done is None:
+            if empty and self.csv_path and os.path.exists(self.csv_path):
+                self.import_csv(self.csv_path, portfolio=DEFAULT_PORTFOLIO)
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('csv_imported', ?)",
+                             (datetime.now().isoformat(timespec='seconds'),))
+
+    def import_csv(self, csv_path, portfolio=None):
+        df = normalize_frame(pd.read_csv(csv_path).dropna(how='all'))
+        return self.insert_frames([df[df['Stock Name'].notna()]], portfolio)
+
+    def _to_row(self, record):
+        row = {}
+        for col in TEXT_COLUMNS:
+            val = record.get(col)
+            row[col] = None if pd.isna(val) or not str(val).strip() else str(val).strip()
+        if row['Stock Name']:
+            row['Stock Name'] = row['Stock Name'].upper()
+        for col in NUMERIC_COLUMNS:
+            val = pd.to_numeric(record.get(col), errors='coerce')
+            row[col] = None if pd.isna(val) else float(val)
+        for col in DATE_COLUMNS:
+            val = record.get(col)
+            if isinstance(val, datetime):
+                row[col] = val.strftime('%Y-%m-%d') if not pd.isna(val) else None
+            else:
+                row[col] = parse_date_strict(val) or None
+        row['Trade Status'] = derive_status(row['Trade Status'], row['Sell %'], row['Sell Price'])
+        return row
+
+    def _bump_revision(self, conn, portfolio=None):
+        # The global revision moves on every write, each portfolio's only on its own
+        portfolio = portfolio or self._write_portfolio
+        key = f"revision:{portfolio}"
+        conn.execute('INSERT OR IGNORE INTO portfolios (name) VALUES (?)', (portfolio,))
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, '0')", (key,))
+        conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key IN ('revision', ?)", (key,))
+
+    def _mark_changed(self, conn, dates, portfolio=None):
+        # Earliest entry/sell date touched since the snapshots were last built; days before it are unaffected
+        dates = [d for d in dates if isinstance(d, str) and d]
+        if dates:
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = min(value, excluded.value)",
+                         (f"changed_from:{portfolio or self._write_portfolio}", min(dates)))
+
+    def _upsert(self, conn, records):
+        db_cols = list(LEDGER_COLUMNS.values()) + ['portfolio']
+        inserts, updates, dates = [], [], []
+        for record in records:
+            row = self._to_row(record)
+            if not row['Stock Name']:
+                continue
+            values = [row[c] for c in LEDGER_COLUMNS] + [self._write_portfolio]
+            dates += [row[c] for c in DATE_COLUMNS]
+            trade_id = record.get('id')
+            if trade_id is None or pd.isna(trade_id):
+                inserts.append(values)
+            else:
+                updates.append([int(trade_id)] + values)
+        if updates:
+            # An edit moves the trade off its old dates as well as onto the new ones
+            ids = [u[0] for u in updates]
+            conn.execute('CREATE TEMP TABLE IF NOT EXISTS edited_ids (id INTEGER PRIMARY KEY)')
+            conn.execute('DELETE FROM edited_ids')
+            conn.executemany('INSERT OR IGNORE INTO edited_ids (id) VALUES (?)', [(i,) for i in ids])
+            dates += [d for row in conn.execute(
+                'SELECT entry_date, sell_date FROM trades WHERE id IN (SELECT id FROM edited_ids) AND portfolio = ?',
+                (self._write_portfolio,)) for d in row]
+        self._mark_changed(conn, dates)
+        placeholders = ', '.join('?' for _ in db_cols)
+        assignments = ', '.join(f"{c} = excluded.{c}" for c in db_cols)
+        conn.executemany(f"INSERT INTO trades ({', '.join(db_cols)}) VALUES ({placeholders})", inserts)
+        # An id from another portfolio is left alone rather than moved into this one
+        conn.executemany(
+            f"INSERT INTO trades (id, {', '.join(db_cols)}) VALUES (?, {placeholders}) "
+            f"ON CONFLICT(id) DO UPDATE SET {assignments} WHERE trades.portfolio = excluded.portfolio", updates)
+        return len(inserts) + len(updates)
+
+    def upsert(self, records):
+        """Insert records without an id and update those with one, in a single transaction."""
+        with self._connect() as conn:
+            count = self._upsert(conn, records)
+            if count:
+                self._bump_revision(conn)
+        return count
+
+    def insert_frames(self, frames, portfolio=None):
+        """Append normalized frames (see normalize_frame) in one transaction; frames may be a generator."""
+        portfolio = portfolio or self._write_portfolio
+        db_cols = list(LEDGER_COLUMNS.values()) + ['portfolio']
+        sql = f"INSERT INTO trades ({', '.join(db_cols)}) VALUES ({', '.join('?' for _ in db_cols)})"
+        count = 0
+        with self._connect() as conn:
+            for frame in frames:
+                frame = frame[list(LEDGER_COLUMNS)].astype(object).assign(portfolio=portfolio)
+                conn.executemany(sql, frame.where(frame.notna(), None).itertuples(index=False, name=None))
+                self._mark_changed(conn, pd.unique(frame[DATE_COLUMNS].to_numpy().ravel()), portfolio)
+                count += len(frame)
+            if count:
+                self._bump_revision(conn, portfolio)
+        return count
+
+    def add_trade(self, record):
+        self.upsert([record])
+
+    def save_frame(self, df):
+        """Make the table match an edited ledger frame: changed rows are upserted, missing ids deleted."""
+        current = self.load_frame().set_index('id')
+        changed, keep_ids = [], set()
+        for record in df.to_dict('records'):
+            trade_id = record.get('id')
+            if trade_id is not None and not pd.isna(trade_id) and int(trade_id) in current.index:
+                keep_ids.add(int(trade_id))
+                if self._to_row(current.loc[int(trade_id)].to_dict()) == self._to_row(record):
+                    continue
+            changed.append(record)
+        removed = [(int(i),) for i in current.index if i not in keep_ids]
+        removed_dates = current.loc[[i for (i,) in removed], DATE_COLUMNS].apply(lambda c: c.dt.strftime('%Y-%m-%d'))
+        with self._connect() as conn:
+            conn.executemany('DELETE FROM trades WHERE id = ? AND portfolio = ?',
+                             [(i, self._write_portfolio) for (i,) in removed])
+            self._mark_changed(conn, removed_dates.to_numpy().ravel())
+            if self._upsert(conn, changed) or removed:
+                self._bump_revision(conn)
+
+    def _query_frame(self, conditions=(), params=()):
+        select = ', '.join(f'{db} AS "{col}"' for col, db in LEDGER_COLUMNS.items())
+        where, params = self._where(conditions, params)
+        with self._connect() as conn:
+            df = pd.read_sql_query(f"SELECT id, {select} FROM trades {where} ORDER BY id", conn, params=params)
+        for col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d')
+        return df
+
+    def query(self, ticker=None, status=None, start=None, end=None, limit=None, offset=0):
+        """Yield Trade records lazily, oldest entry first.
+
+        ticker/status take one value or a list; start/end bound the entry date (inclusive).
+        Every filter maps onto one of the table's indexes, so selective queries don't scan the ledger.
+        """
+        conditions, params = [], []
+        for column, value in (('stock_name', ticker), ('trade_status', status)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params += [str(v).upper().strip() for v in values]
+        if start is not None:
+            conditions.append('entry_date >= ?')
+            params.append(f"{pd.Timestamp(start):%Y-%m-%d}")
+        if end is not None:
+            conditions.append('entry_date <= ?')
+            params.append(f"{pd.Timestamp(end):%Y-%m-%d}")
+        where, params = self._where(conditions, params)
+        sql = f"SELECT id, {', '.join(LEDGER_COLUMNS.values())} FROM trades {where} ORDER BY entry_date, id LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else int(limit), int(offset)]
+
+        date_fields = [Trade._fields.index(LEDGER_COLUMNS[col]) for col in DATE_COLUMNS]
+        with self._connect() as conn:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(QUERY_BATCH_SIZE)
+                if not rows:
+                    return
+                for row in rows:
+                    row = list(row)
+                    for i in date_fields:
+                        row[i] = date.fromisoformat(row[i]) if row[i] else None
+                    yield Trade(*row)
+
+    def load_frame(self):
+        return self._query_frame()
+
+    def open_positions(self):
+        return self._query_frame(["trade_status != 'CLOSED'"])
+
+    def tickers(self, open_only=True):
+        where, params = self._where(["trade_status != 'CLOSED'"] if open_only else [])
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute(f'SELECT DISTINCT stock_name FROM trades {where} ORDER BY stock_name', params)]
+
+    def lots(self, ticker):
+        return self._query_frame(['stock_name = ?'], [ticker.upper().strip()])
+
+    def revision(self):
+        key = 'revision' if self.portfolio is None else f"revision:{self.portfolio}"
+        with self._connect() as conn:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def portfolios(self):
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute(
+                'SELECT name FROM portfolios UNION SELECT DISTINCT portfolio FROM trades ORDER BY 1')]
+
+    def create_portfolio(self, name):
+        name = name.strip()
+        if name:
+            with self._connect() as conn:
+                conn.execute('INSERT OR IGNORE INTO portfolios (name) VALUES (?)', (name,))
+        return name